@@ -1,9 +1,19 @@
+from django.conf import settings
+from django.utils.decorators import method_decorator
 from django.views.generic.base import TemplateView
 
+from core.decorators import cache_headers
 
+about_cache = method_decorator(
+    cache_headers(settings.ABOUT_PAGE_MAX_AGE), name='dispatch'
+)
+
+
+@about_cache
 class AboutAuthorView(TemplateView):
     template_name = 'about/author.html'
 
 
+@about_cache
 class AboutTechView(TemplateView):
     template_name = 'about/tech.html'
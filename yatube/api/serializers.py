@@ -0,0 +1,76 @@
+class InvalidFields(Exception):
+    pass
+
+
+class Serializer:
+    """Turn model instances into dicts with a subset of ``fields``.
+
+    ``fields`` maps a name to a getter, ``related`` maps a name to the
+    relation it needs, so only requested relations are joined.
+    """
+    fields = {}
+    related = {}
+
+    def __init__(self, requested=None):
+        if not requested:
+            self.names = list(self.fields)
+            return
+        self.names = [name for name in requested.split(',') if name]
+        unknown = set(self.names) - set(self.fields)
+        if unknown:
+            raise InvalidFields(
+                f'Unknown fields: {", ".join(sorted(unknown))}'
+            )
+
+    def prepare(self, queryset):
+        related = {self.related[name] for name in self.names
+                   if name in self.related}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
+
+    def __call__(self, obj):
+        return {name: self.fields[name](obj) for name in self.names}
+
+
+class PostSerializer(Serializer):
+    fields = {
+        'id': lambda post: post.pk,
+        'text': lambda post: post.text,
+        'pub_date': lambda post: post.pub_date,
+        'author': lambda post: post.author.username,
+        'group': lambda post: post.group.slug if post.group_id else None,
+        'image': lambda post: post.image.url if post.image else None,
+        'comments_count': lambda post: post.comments_count,
+    }
+    related = {'author': 'author', 'group': 'group'}
+
+
+class CommentSerializer(Serializer):
+    fields = {
+        'id': lambda comment: comment.pk,
+        'post': lambda comment: comment.post_id,
+        'author': lambda comment: comment.author.username,
+        'text': lambda comment: comment.text,
+        'created': lambda comment: comment.created,
+    }
+    related = {'author': 'author'}
+
+
+class GroupSerializer(Serializer):
+    fields = {
+        'slug': lambda group: group.slug,
+        'title': lambda group: group.title,
+        'description': lambda group: group.description,
+        'posts_count': lambda group: group.posts_count,
+    }
+
+
+class ProfileSerializer(Serializer):
+    fields = {
+        'username': lambda user: user.username,
+        'full_name': lambda user: user.get_full_name(),
+        'posts_count': lambda user: user.posts_count,
+        'followers_count': lambda user: user.followers_count,
+        'following_count': lambda user: user.following_count,
+    }
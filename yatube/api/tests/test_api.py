@@ -0,0 +1,162 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Test group', slug='test-slug', description='Description'
+        )
+        cls.author = User.objects.create_user(username='Boba')
+        cls.reader = User.objects.create_user(username='Fennec')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Post {number}', group=cls.group
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Comment'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_endpoints_return_json(self):
+        """Every endpoint answers with JSON."""
+        post_id = self.posts[0].pk
+        urls = [
+            reverse('api:post_list'),
+            reverse('api:post_detail', kwargs={'post_id': post_id}),
+            reverse('api:post_comments', kwargs={'post_id': post_id}),
+            reverse('api:group_list'),
+            reverse('api:group_detail', kwargs={'slug': 'test-slug'}),
+            reverse('api:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('api:profile_detail', kwargs={'username': 'Boba'}),
+            reverse('api:profile_posts', kwargs={'username': 'Boba'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+
+    @override_settings(PAGINATOR_AMOUNT=2)
+    def test_post_list_is_paginated_by_cursor(self):
+        """Post list pages through posts newest first."""
+        url = reverse('api:post_list')
+        first = self.client.get(url).json()
+        self.assertEqual(
+            [post['id'] for post in first['results']],
+            [self.posts[2].pk, self.posts[1].pk]
+        )
+        second = self.client.get(url, {'cursor': first['next']}).json()
+        self.assertEqual(
+            [post['id'] for post in second['results']], [self.posts[0].pk]
+        )
+        self.assertIsNone(second['next'])
+
+    def test_fields_select_keys(self):
+        """Only requested fields are returned, unknown ones are rejected."""
+        url = reverse('api:post_detail', kwargs={'post_id': self.posts[0].pk})
+        response = self.client.get(url, {'fields': 'id,author'})
+        self.assertEqual(
+            response.json(), {'id': self.posts[0].pk, 'author': 'Boba'}
+        )
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_objects_return_json_404(self):
+        """Missing objects are reported as JSON."""
+        response = self.client.get(
+            reverse('api:group_posts', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Not found.'})
+
+    def test_unchanged_feed_answers_not_modified(self):
+        """Polling with the ETag gets 304 without reading posts."""
+        url = reverse('api:post_list')
+        etag = self.client.get(url)['ETag']
+        # Newest post date and content version.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_etag(self):
+        """Editing or commenting a post changes feed and post ETags."""
+        list_url = reverse('api:post_list')
+        post = self.posts[1]
+        post_url = reverse('api:post_detail', kwargs={'post_id': post.pk})
+        list_etag = self.client.get(list_url)['ETag']
+        post_etag = self.client.get(post_url)['ETag']
+        post.text = 'Edited'
+        post.save()
+        self.assertEqual(
+            self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag)
+            .status_code,
+            200
+        )
+        response = self.client.get(post_url, HTTP_IF_NONE_MATCH=post_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['text'], 'Edited')
+
+    def test_group_etags_follow_group_data(self):
+        """New posts and deleted groups change group ETags."""
+        detail_url = reverse('api:group_detail', kwargs={'slug': 'test-slug'})
+        list_url = reverse('api:group_list')
+        detail_etag = self.client.get(detail_url)['ETag']
+        list_etag = self.client.get(list_url)['ETag']
+        Post.objects.create(author=self.author, text='New', group=self.group)
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['posts_count'], 4)
+        Group.objects.create(title='Other', slug='other').delete()
+        response = self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etags_survive_cache_clearing(self):
+        """Validators are kept in the database, not in the cache."""
+        url = reverse('api:post_detail', kwargs={'post_id': self.posts[0].pk})
+        etag = self.client.get(url)['ETag']
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Another'
+        )
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_pages_have_own_etags(self):
+        """Different query strings have different ETags."""
+        url = reverse('api:post_list')
+        self.assertNotEqual(
+            self.client.get(url)['ETag'],
+            self.client.get(url, {'fields': 'id'})['ETag']
+        )
+
+    def test_follow_feed_requires_login(self):
+        """Follow feed is only available to authorized users."""
+        url = reverse('api:follow_feed')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_api_is_read_only(self):
+        """Unsafe methods are not allowed."""
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
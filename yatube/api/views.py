@@ -0,0 +1,177 @@
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from core.decorators import conditional
+from posts import changes, counters, timeline
+from posts.models import Group, Post, User
+from posts.paginator import CursorPaginator
+
+from .serializers import (CommentSerializer, GroupSerializer,
+                          InvalidFields, PostSerializer, ProfileSerializer)
+
+
+def api_view(view):
+    """Read-only endpoint answering errors with JSON."""
+    @require_safe
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+        except InvalidFields as error:
+            return JsonResponse({'detail': str(error)}, status=400)
+    return inner
+
+
+def paginate(request, queryset, serializer, **options):
+    paginator = CursorPaginator(
+        serializer.prepare(queryset), settings.PAGINATOR_AMOUNT, **options
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+        'results': [serializer(obj) for obj in page],
+    })
+
+
+def fields(request, serializer_class):
+    return serializer_class(request.GET.get('fields'))
+
+
+def posts_state(request):
+    return changes.state(changes.latest(Post.objects))
+
+
+@api_view
+@conditional(posts_state)
+def post_list(request):
+    return paginate(request, Post.objects, fields(request, PostSerializer))
+
+
+def post_state(request, post_id):
+    post = get_object_or_404(
+        Post.objects.values('version', 'pub_date'), pk=post_id
+    )
+    version, last_modified = changes.state(post['pub_date'])
+    return f'{post_id}:{post["version"]}:{version}', last_modified
+
+
+@api_view
+@conditional(post_state)
+def post_detail(request, post_id):
+    serializer = fields(request, PostSerializer)
+    post = get_object_or_404(serializer.prepare(Post.objects), pk=post_id)
+    return JsonResponse(serializer(post))
+
+
+@api_view
+@conditional(post_state)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    return paginate(
+        request,
+        post.comments.all(),
+        fields(request, CommentSerializer),
+        ordering=('created', 'id'),
+        count=post.comments_count
+    )
+
+
+def groups_state(request):
+    groups = Group.objects.aggregate(count=Count('pk'), last=Max('pk'))
+    version, last_modified = changes.state()
+    return f'{groups["count"]}:{groups["last"]}:{version}', last_modified
+
+
+@api_view
+@conditional(groups_state)
+def group_list(request):
+    return paginate(
+        request,
+        Group.objects.all(),
+        fields(request, GroupSerializer),
+        ordering=('slug',)
+    )
+
+
+def group_state(request, slug):
+    group = get_object_or_404(Group.objects.only('posts_count'), slug=slug)
+    version, last_modified = changes.state(changes.latest(group.posts))
+    return f'{group.pk}:{group.posts_count}:{version}', last_modified
+
+
+@api_view
+@conditional(group_state)
+def group_detail(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return JsonResponse(fields(request, GroupSerializer)(group))
+
+
+@api_view
+@conditional(group_state)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return paginate(
+        request,
+        group.posts.all(),
+        fields(request, PostSerializer),
+        count=group.posts_count
+    )
+
+
+def profile_state(request, username):
+    author = get_object_or_404(User, username=username)
+    return changes.state(changes.latest(author.posts))
+
+
+@api_view
+@conditional(profile_state)
+def profile_detail(request, username):
+    author = get_object_or_404(User, username=username)
+    author.posts_count = counters.author_posts_count(author)
+    author.followers_count = counters.author_followers_count(author.pk)
+    author.following_count = author.follower.count()
+    return JsonResponse(fields(request, ProfileSerializer)(author))
+
+
+@api_view
+@conditional(profile_state)
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return paginate(
+        request,
+        author.posts.all(),
+        fields(request, PostSerializer),
+        count=counters.author_posts_count(author)
+    )
+
+
+def follow_state(request):
+    if not request.user.is_authenticated:
+        return '', None
+    posts = timeline.follow_posts(request.user)
+    version, last_modified = changes.state(changes.latest(posts, 'feed_date'))
+    return f'{request.user.pk}:{version}', last_modified
+
+
+@api_view
+@conditional(follow_state)
+def follow_feed(request):
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=401
+        )
+    return paginate(
+        request,
+        timeline.follow_posts(request.user),
+        fields(request, PostSerializer),
+        ordering=('-feed_date', '-feed_id')
+    )
@@ -0,0 +1,164 @@
+"""SQLite backed cache shared by all worker processes on one host.
+
+Entries live in a single SQLite file in WAL mode, so every process sees
+the same values and invalidation reaches all of them. Use it with::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+        }
+    }
+"""
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def _alive(self):
+        return '(expires IS NULL OR expires > ?)', (time.time(),)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        key_map = {}
+        for key in keys:
+            self.validate_key(key)
+            key_map[self.make_key(key, version)] = key
+        if not key_map:
+            return {}
+        alive, params = self._alive()
+        rows = self._connection.execute(
+            f'SELECT key, value FROM cache WHERE {alive} '
+            f'AND key IN ({", ".join("?" * len(key_map))})',
+            params + tuple(key_map)
+        ).fetchall()
+        found = {key_map[key]: pickle.loads(value) for key, value in rows}
+        self.hits += len(found)
+        self.misses += len(key_map) - len(found)
+        return found
+
+    def _store(self, mode, key, value, timeout, version):
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        value = pickle.dumps(value, self.pickle_protocol)
+        expires = self.get_backend_timeout(timeout)
+        connection = self._connection
+        if mode == 'add':
+            alive, params = self._alive()
+            connection.execute(
+                f'DELETE FROM cache WHERE key = ? AND NOT {alive}',
+                (key,) + params
+            )
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO cache VALUES (?, ?, ?)',
+                (key, value, expires)
+            )
+        else:
+            cursor = connection.execute(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                (key, value, expires)
+            )
+        self._cull()
+        return cursor.rowcount > 0
+
+    def _cull(self):
+        connection = self._connection
+        (count,) = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count <= self._max_entries:
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+        )
+        (count,) = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count > self._max_entries and self._cull_frequency:
+            connection.execute(
+                'DELETE FROM cache WHERE rowid IN '
+                '(SELECT rowid FROM cache ORDER BY rowid LIMIT ?)',
+                (count // self._cull_frequency,)
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._store('add', key, value, timeout, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store('set', key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        alive, params = self._alive()
+        cursor = self._connection.execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {alive}',
+            (self.get_backend_timeout(timeout), key) + params
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        cursor = self._connection.execute(
+            'DELETE FROM cache WHERE key = ?', (key,)
+        )
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version)
+        self.validate_key(key)
+        alive, params = self._alive()
+        return self._connection.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {alive}',
+            (key,) + params
+        ).fetchone() is not None
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Connections are kept per thread for the life of the process.
+        pass
+
+    def stats(self):
+        alive, params = self._alive()
+        entries, size = self._connection.execute(
+            f'SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) '
+            f'FROM cache WHERE {alive}',
+            params
+        ).fetchone()
+        return {
+            'location': self._path,
+            'entries': entries,
+            'bytes': size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,62 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+
+def conditional(state):
+    """Answer GET and HEAD with 304 when the client copy is current.
+
+    ``state(request, *args, **kwargs)`` returns a version string and the
+    last modification time, both computed without rendering the view. The
+    ETag also covers the query string, so every page has its own.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            version, last_modified = state(request, *args, **kwargs)
+            etag = quote_etag(hashlib.md5(
+                f'{version}?{request.GET.urlencode()}'.encode()
+            ).hexdigest())
+            timestamp = None
+            if last_modified is not None:
+                timestamp = int(last_modified.timestamp())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.setdefault('ETag', etag)
+                if timestamp is not None:
+                    response.setdefault('Last-Modified', http_date(timestamp))
+            return response
+        return inner
+    return decorator
+
+
+def cache_headers(max_age):
+    """Let shared caches keep pages of anonymous users for ``max_age``.
+
+    Pages of authorized users show their name and forms, so they are only
+    kept by the browser and revalidated on every visit.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if (request.method not in ('GET', 'HEAD')
+                    or response.status_code not in (200, 304)):
+                return response
+            patch_vary_headers(response, ('Cookie',))
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, max_age=0)
+            else:
+                patch_cache_control(response, public=True, max_age=max_age)
+            return response
+        return inner
+    return decorator
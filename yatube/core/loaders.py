@@ -0,0 +1,154 @@
+"""Request-scoped identity map with batched loading of foreign keys.
+
+``LoaderMiddleware`` gives every request a ``Loader`` that keeps one
+instance per model and primary key, starting with the signed in user.
+Foreign keys passed to ``batch`` take their targets from it, loading
+only the columns ``batch`` names for each field. Rows of the map that
+lack columns a field needs are completed by its next load.
+``expect(objects, *fields)`` announces the rows a page will need: the
+first access to any of them loads all of them with one ``IN`` query,
+while rows already in the map, or never read because a cached fragment
+skipped them, cost nothing.
+"""
+import threading
+from collections import defaultdict
+
+from django.db.models.fields.related_descriptors import (
+    ForwardManyToOneDescriptor
+)
+
+_state = threading.local()
+
+
+class Loader:
+
+    def __init__(self, user=None):
+        self.user = user
+        self.instances = defaultdict(dict)
+        # Primary keys to load, by model and columns.
+        self.pending = defaultdict(set)
+
+    def add(self, instance):
+        """Instance of the map for the row of ``instance``."""
+        known = self.instances[type(instance)]
+        return known.setdefault(instance.pk, instance)
+
+    def expect(self, objects, *fields):
+        """Load targets of ``fields`` of ``objects`` together when needed."""
+        objects = list(objects)
+        if not objects:
+            return
+        for name in fields:
+            field = objects[0]._meta.get_field(name)
+            columns = getattr(getattr(type(objects[0]), name), 'columns', None)
+            known = self.instances[field.related_model]
+            pending = self.pending[field.related_model, columns]
+            for instance in objects:
+                pk = getattr(instance, field.attname)
+                if (pk is not None and not field.is_cached(instance)
+                        and (pk not in known
+                             or lacks(known[pk], columns))):
+                    pending.add(pk)
+
+    def get_many(self, model, pks, hints=None, columns=None):
+        """``{pk: instance}`` of rows that exist, loading missing ones.
+
+        Only ``columns`` are loaded, all of them for None.
+        """
+        if self.user is not None:
+            user, self.user = self.user, None
+            if user.is_authenticated:
+                # request.user is lazy, keep the user it wraps.
+                self.add(getattr(user, '_wrapped', user))
+        known = self.instances[model]
+        missing = {
+            pk for pk in set(pks) | self.pending.pop((model, columns), set())
+            if pk not in known or lacks(known[pk], columns)
+        }
+        if missing:
+            manager = model._base_manager.db_manager(hints=hints or {})
+            rows = manager.filter(pk__in=missing)
+            if columns is not None:
+                rows = rows.only(*columns)
+            for instance in rows:
+                found = known.setdefault(instance.pk, instance)
+                # Complete the instance of the map, keeping it the only one.
+                for attname in (found.get_deferred_fields()
+                                - instance.get_deferred_fields()):
+                    setattr(found, attname, getattr(instance, attname))
+        return {pk: known[pk] for pk in pks if pk in known}
+
+
+def lacks(instance, columns):
+    """Whether ``columns`` of ``instance``, all for None, are deferred."""
+    deferred = instance.get_deferred_fields()
+    if columns is None or not deferred:
+        return bool(deferred)
+    meta = instance._meta
+    return any(meta.get_field(name).attname in deferred for name in columns)
+
+
+def current():
+    return getattr(_state, 'loader', None)
+
+
+def add(instance):
+    """Put ``instance`` into the map of the current request."""
+    loader = current()
+    if loader is None:
+        return instance
+    return loader.add(instance)
+
+
+def expect(objects, *fields):
+    loader = current()
+    if loader is not None:
+        loader.expect(objects, *fields)
+
+
+class BatchedForwardDescriptor(ForwardManyToOneDescriptor):
+
+    def __init__(self, field_with_rel, columns=None):
+        super().__init__(field_with_rel)
+        self.columns = None if columns is None else frozenset(columns)
+
+    def get_object(self, instance):
+        loader = current()
+        if loader is None or not self.field.target_field.primary_key:
+            return super().get_object(instance)
+        model = self.field.related_model
+        pk = getattr(instance, self.field.attname)
+        found = loader.get_many(
+            model, [pk], hints={'instance': instance}, columns=self.columns
+        )
+        if pk not in found:
+            raise model.DoesNotExist(
+                f'{model._meta.object_name} matching query does not exist.'
+            )
+        return found[pk]
+
+
+def batch(model, **columns):
+    """Load foreign keys of ``model`` through the loader.
+
+    Keywords name the fields and the columns of their targets to load,
+    None loads every column. Other columns are deferred.
+    """
+    for name, only in columns.items():
+        setattr(model, name, BatchedForwardDescriptor(
+            model._meta.get_field(name), only
+        ))
+
+
+class LoaderMiddleware:
+    """Loader for every request, must follow ``AuthenticationMiddleware``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.loader = Loader(getattr(request, 'user', None))
+        try:
+            return self.get_response(request)
+        finally:
+            _state.loader = None
@@ -0,0 +1,115 @@
+import io
+import json
+import os
+import pstats
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import SAMPLES_FILE
+
+PARTS = ('wall_ms', 'db_ms', 'templates_ms', 'other_ms')
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+class Command(BaseCommand):
+    help = 'Aggregate sampled view profiles into a top-N report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', default=settings.PROFILING_DIR,
+            help='Directory with the samples.'
+        )
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--view', help='Only report views starting with this name.'
+        )
+
+    def handle(self, *args, **options):
+        directory = options['dir']
+        path = os.path.join(directory, SAMPLES_FILE)
+        if not os.path.isfile(path):
+            raise CommandError(f'No samples in {directory}.')
+        samples = defaultdict(list)
+        with open(path) as file:
+            for line in file:
+                record = json.loads(line)
+                if record['view'].startswith(options['view'] or ''):
+                    samples[record['view']].append(record)
+        views = sorted(
+            samples.items(),
+            key=lambda item: sum(record['wall_ms'] for record in item[1]),
+            reverse=True,
+        )[:options['top']]
+        for view, records in views:
+            self.report(directory, view, records, options['top'])
+
+    def report(self, directory, view, records, top):
+        self.report_timings(view, records, top)
+        dumps = [os.path.join(directory, record['dump'])
+                 for record in records if record.get('dump')]
+        self.report_profiles(
+            [dump for dump in dumps if dump.endswith('.prof')], top
+        )
+        self.report_stacks(
+            os.path.join(directory, f'{view}.collapsed'),
+            [dump for dump in dumps if dump.endswith('.collapsed')],
+            top
+        )
+
+    def report_timings(self, view, records, top):
+        means = {part: mean([record[part] for record in records])
+                 for part in PARTS}
+        sections = defaultdict(float)
+        templates = defaultdict(float)
+        for record in records:
+            for name, value in record['sections_ms'].items():
+                sections[name] += value / len(records)
+            for name, value in record['templates'].items():
+                templates[name] += value / len(records)
+        self.stdout.write(
+            f'{view}: {len(records)} samples, '
+            f'{means["wall_ms"]:.1f} ms mean wall time, '
+            f'{mean([record["queries"] for record in records]):.1f} queries'
+        )
+        parts = [('db', means['db_ms']), ('templates', means['templates_ms'])]
+        parts += sorted(sections.items())
+        parts.append(('other', means['other_ms']))
+        for name, value in parts:
+            self.stdout.write(f'  {name:<40} {value:9.2f} ms')
+        self.stdout.write('  templates, including nested ones:')
+        for name, value in sorted(templates.items(),
+                                  key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'    {name:<38} {value:9.2f} ms')
+
+    def report_profiles(self, profiles, top):
+        if not profiles:
+            return
+        stream = io.StringIO()
+        stats = pstats.Stats(*profiles, stream=stream)
+        stats.sort_stats('cumulative').print_stats(top)
+        self.stdout.write(stream.getvalue())
+
+    def report_stacks(self, merged, dumps, top):
+        """Merge collapsed stacks into one file and list hottest frames."""
+        stacks = Counter()
+        for dump in dumps:
+            with open(dump) as file:
+                for line in file:
+                    stack, count = line.rsplit(' ', 1)
+                    stacks[stack] += int(count)
+        if not stacks:
+            return
+        frames = Counter()
+        with open(merged, 'w') as file:
+            for stack, count in stacks.items():
+                file.write(f'{stack} {count}\n')
+                frames[stack.rsplit(';', 1)[-1]] += count
+        total = sum(frames.values())
+        self.stdout.write(f'  hottest frames, all stacks in {merged}:')
+        for frame, count in frames.most_common(top):
+            self.stdout.write(f'    {frame:<38} {count / total:9.1%}')
@@ -0,0 +1,33 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks until stopped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int,
+            help='Threads running tasks, TASKS_WORKERS by default.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when no task is due.'
+        )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        # Running tasks are finished before the worker exits.
+        handlers = {
+            signum: signal.signal(signum, lambda *args: stop.set())
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            tasks.work(options['workers'], options['once'], stop)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
@@ -0,0 +1,142 @@
+"""Serving of uploaded media files.
+
+Files answer conditional and byte range requests. With ``MEDIA_OFFLOAD``
+the transfer itself is handed to the front server through
+``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` (Apache, lighttpd).
+Otherwise whole files go through ``wsgi.file_wrapper``, which servers
+such as gunicorn send with ``os.sendfile``.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import (ImproperlyConfigured,
+                                    SuspiciousFileOperation)
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """``(first, last)`` byte of a single range, None to send everything.
+
+    Multiple ranges are not supported and fall back to the whole file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise RangeNotSatisfiable
+    return first, last
+
+
+def read_range(path, first, length):
+    with open(path, 'rb') as file:
+        file.seek(first)
+        while length > 0:
+            data = file.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def offload(path, full_path):
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        return 'X-Accel-Redirect', settings.MEDIA_OFFLOAD_PREFIX + quote(path)
+    if settings.MEDIA_OFFLOAD == 'x-sendfile':
+        return 'X-Sendfile', full_path
+    raise ImproperlyConfigured(
+        'MEDIA_OFFLOAD must be "x-accel-redirect", "x-sendfile" or None'
+    )
+
+
+def is_immutable(path):
+    return path.startswith(settings.MEDIA_IMMUTABLE_PREFIXES)
+
+
+def serve(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    stat = os.stat(full_path)
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = file_response(request, path, full_path, stat.st_size,
+                                 etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if is_immutable(path):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_MAX_AGE
+        )
+    return response
+
+
+def file_response(request, path, full_path, size, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    if settings.MEDIA_OFFLOAD:
+        response = HttpResponse(content_type=content_type)
+        header, value = offload(path, full_path)
+        response[header] = value
+        return response
+    requested = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and (
+            parse_http_date_safe(if_range) != last_modified):
+        requested = None
+    try:
+        byte_range = requested and parse_range(requested, size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range:
+        first, last = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, first, last - first + 1),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Length'] = last - first + 1
+    else:
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type
+        )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,331 @@
+"""Prometheus metrics of requests, queries, caches, thumbnails and tasks.
+
+Metrics are kept in memory of every process. With ``METRICS_DIR`` each
+process also writes its values to its own file there, at most
+``METRICS_FLUSH_INTERVAL`` seconds late, and the ``/metrics/`` endpoint
+sums the files of all worker processes, the way counters and histograms
+of ``prometheus_client`` multiprocess mode are aggregated.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from . import tracing
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.name = f'{self.pid}-{uuid.uuid4().hex[:8]}.json'
+        self.values = defaultdict(float)
+        self.timer = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add(self, increments):
+        """Add ``{(sample, labels): amount}`` to the current values."""
+        with self.lock:
+            if self.pid != os.getpid():
+                # Values of the parent stay with the parent after a fork.
+                self._reset()
+            for key, amount in increments.items():
+                self.values[key] += amount
+            if settings.METRICS_DIR and self.timer is None:
+                self.timer = threading.Timer(
+                    settings.METRICS_FLUSH_INTERVAL, self.flush
+                )
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """Write values of this process to its file in ``METRICS_DIR``."""
+        directory = settings.METRICS_DIR
+        with self.lock:
+            self.timer = None
+            if not directory or self.pid != os.getpid():
+                return
+            data = [[name, labels, value]
+                    for (name, labels), value in self.values.items()]
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.name)
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(data, file)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """Values of all processes, ``{(sample, labels): value}``."""
+        directory = settings.METRICS_DIR
+        if not directory:
+            with self.lock:
+                return dict(self.values)
+        self.flush()
+        values = defaultdict(float)
+        for name in os.listdir(directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directory, name)) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for sample, labels, value in data:
+                values[sample, tuple(map(tuple, labels))] += value
+        return values
+
+    def exposition(self):
+        """Values in the Prometheus text format."""
+        samples = defaultdict(list)
+        for (name, labels), value in sorted(self.collect().items(),
+                                            key=sort_key):
+            samples[name].append((labels, value))
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name in metric.sample_names():
+                for labels, value in samples.get(name, ()):
+                    lines.append(f'{name}{format_labels(labels)} '
+                                 f'{format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def sort_key(item):
+    """Order samples by labels, histogram buckets by their bound."""
+    (name, labels), _ = item
+    return name, tuple(
+        (label, float(value) if label == 'le' else value)
+        for label, value in labels
+    )
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('\n', r'\n').replace('"', r'\"'))
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    def labels(self, values):
+        if set(values) != set(self.labelnames):
+            raise ValueError(
+                f'{self.name} takes labels {", ".join(self.labelnames)}'
+            )
+        return tuple((name, str(values[name])) for name in self.labelnames)
+
+    def sample_names(self):
+        return [self.name]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.add({(self.name, self.labels(labels)): amount})
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=(),
+                 registry=None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def sample_names(self):
+        return [f'{self.name}_bucket', f'{self.name}_sum',
+                f'{self.name}_count']
+
+    def observe(self, value, **labels):
+        labels = self.labels(labels)
+        increments = {
+            (f'{self.name}_bucket', labels + (('le', format_value(bound)),)):
+                int(value <= bound)
+            for bound in self.buckets
+        }
+        increments[f'{self.name}_sum', labels] = value
+        increments[f'{self.name}_count', labels] = 1
+        self.registry.add(increments)
+
+
+REGISTRY = Registry()
+
+REQUESTS = Counter(
+    'yatube_requests_total',
+    'HTTP requests by URL name, method and status.',
+    ('view', 'method', 'status'),
+)
+REQUEST_SECONDS = Histogram(
+    'yatube_request_duration_seconds',
+    'Time to build a response, by URL name.',
+    ('view',),
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'yatube_request_queries',
+    'Database queries per request, by URL name.',
+    ('view',),
+    (0, 1, 2, 5, 10, 20, 50, 100),
+)
+CACHE_LOOKUPS = Counter(
+    'yatube_cache_lookups_total',
+    'Cache lookups by cache alias and result, hit or miss.',
+    ('cache', 'result'),
+)
+THUMBNAIL_SECONDS = Histogram(
+    'yatube_thumbnail_generation_seconds',
+    'Time to generate one post image thumbnail, by format.',
+    ('format',),
+    (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+UPLOAD_BYTES = Histogram(
+    'yatube_upload_size_bytes',
+    'Size of uploaded post images.',
+    (),
+    (2 ** 14, 2 ** 16, 2 ** 18, 2 ** 20, 2 ** 22, 2 ** 24, 2 ** 26),
+)
+TASKS = Counter(
+    'yatube_tasks_total',
+    'Background task runs by task and result, done, retried or failed.',
+    ('task', 'result'),
+)
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Count requests, their duration and queries, the first middleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(queries)
+                )
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        REQUESTS.inc(
+            view=view, method=request.method, status=response.status_code
+        )
+        REQUEST_SECONDS.observe(elapsed, view=view)
+        REQUEST_QUERIES.observe(queries.count, view=view)
+        return response
+
+
+_missing = object()
+
+TRACED_CACHE_CALLS = frozenset((
+    'add', 'get_or_set', 'set', 'set_many', 'touch', 'delete',
+    'delete_many', 'has_key', 'incr', 'decr', 'clear',
+))
+
+
+class InstrumentedCache:
+    """Cache backend counting hits and misses of the one it wraps.
+
+    Calls are traced as spans. Settings name the wrapped backend in
+    ``CACHE_BACKEND`` and the alias used as the label in ``ALIAS``.
+    """
+
+    def __init__(self, location, params):
+        params = dict(params)
+        self.alias = params.pop('ALIAS', 'default')
+        self.backend = import_string(params.pop('CACHE_BACKEND'))(
+            location, params
+        )
+
+    def __getattr__(self, name):
+        if name == 'backend':
+            raise AttributeError(name)
+        attribute = getattr(self.backend, name)
+        if name in TRACED_CACHE_CALLS:
+            return self.traced(name, attribute)
+        return attribute
+
+    def traced(self, name, method):
+        @wraps(method)
+        def call(*args, **kwargs):
+            with tracing.span(f'cache.{name}', tracing.CLIENT,
+                              {'cache.alias': self.alias}):
+                return method(*args, **kwargs)
+        return call
+
+    def get(self, key, default=None, version=None):
+        with tracing.span('cache.get', tracing.CLIENT,
+                          {'cache.alias': self.alias}):
+            value = self.backend.get(key, _missing, version)
+        if value is _missing:
+            CACHE_LOOKUPS.inc(cache=self.alias, result='miss')
+            return default
+        CACHE_LOOKUPS.inc(cache=self.alias, result='hit')
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with tracing.span('cache.get_many', tracing.CLIENT,
+                          {'cache.alias': self.alias}):
+            found = self.backend.get_many(keys, version)
+        if found:
+            CACHE_LOOKUPS.inc(len(found), cache=self.alias, result='hit')
+        if len(keys) > len(found):
+            CACHE_LOOKUPS.inc(
+                len(keys) - len(found), cache=self.alias, result='miss'
+            )
+        return found
@@ -0,0 +1,65 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    name = models.CharField(
+        verbose_name='Function',
+        max_length=200
+    )
+    arguments = models.TextField(
+        verbose_name='Arguments',
+        default='[[], {}]'
+    )
+    key = models.CharField(
+        verbose_name='Idempotency key',
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True
+    )
+    status = models.CharField(
+        verbose_name='Status',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Attempts',
+        default=0
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Run at',
+        default=timezone.now
+    )
+    created = models.DateTimeField(
+        verbose_name='Created',
+        auto_now_add=True
+    )
+    error = models.TextField(
+        verbose_name='Last error',
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('run_at', 'id')
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='task_status_run_at_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
@@ -0,0 +1,228 @@
+"""Sampled profiling of views.
+
+``ProfilingMiddleware`` profiles a ``PROFILING_SAMPLE_RATE`` fraction of
+requests to views of the ``PROFILING_VIEWS`` modules. The wall time of a
+sampled request is split into database queries, template rendering and
+``section`` blocks such as thumbnail work, each counted once without the
+nested parts, and appended to ``samples.jsonl`` in ``PROFILING_DIR``.
+``PROFILING_OUTPUT`` also saves a cProfile dump ("pstats") or sampled
+call stacks in collapsed format ("collapsed", for flamegraph.pl or
+speedscope) of every sample. The ``profile_report`` command aggregates
+the samples.
+"""
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+from django.urls import Resolver404, resolve
+
+SAMPLES_FILE = 'samples.jsonl'
+
+_state = threading.local()
+_template_render = None
+
+
+class Sample:
+    """Time spent in every kind of work during one request."""
+
+    def __init__(self, view):
+        self.view = view
+        self.timings = defaultdict(float)
+        self.templates = defaultdict(float)
+        self.queries = 0
+        self._stack = []
+
+    @contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            self.timings[name] += elapsed - nested
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        with self.section('db'):
+            return execute(sql, params, many, context)
+
+
+def current():
+    return getattr(_state, 'sample', None)
+
+
+@contextmanager
+def section(name):
+    """Count the block as ``name`` work when the request is sampled."""
+    sample = current()
+    if sample is None:
+        yield
+        return
+    with sample.section(name):
+        yield
+
+
+def render(self, context):
+    sample = current()
+    if sample is None:
+        return _template_render(self, context)
+    start = time.perf_counter()
+    try:
+        with sample.section('templates'):
+            return _template_render(self, context)
+    finally:
+        name = self.origin.template_name or '<string>'
+        sample.templates[name] += time.perf_counter() - start
+
+
+def install():
+    """Time template rendering, including ``{% include %}``."""
+    global _template_render
+    if _template_render is None:
+        _template_render = Template.render
+        Template.render = render
+
+
+class StackSampler(threading.Thread):
+    """Count call stacks of a thread every ``interval`` seconds."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profiling', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f'{frame.f_globals.get("__name__", "?")}:{code.co_name}'
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+
+
+def profiled_view(path):
+    """Dotted name of the view of ``path`` if it is profiled, else None."""
+    try:
+        func = resolve(path).func
+    except Resolver404:
+        return None
+    view = f'{func.__module__}.{func.__name__}'
+    if view.startswith(tuple(f'{module}.' for module in
+                             settings.PROFILING_VIEWS)):
+        return view
+    return None
+
+
+class ProfilingMiddleware:
+    """Profile sampled requests, should be the last middleware."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        view = profiled_view(request.path_info)
+        if view is None:
+            return self.get_response(request)
+        sample = Sample(view)
+        output = settings.PROFILING_OUTPUT
+        profile = sampler = None
+        _state.sample = sample
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(sample)
+                    )
+                if output == 'pstats':
+                    profile = cProfile.Profile()
+                    profile.enable()
+                elif output == 'collapsed':
+                    sampler = StackSampler(
+                        threading.get_ident(), settings.PROFILING_INTERVAL
+                    )
+                    sampler.start()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profile is not None:
+                        profile.disable()
+                    if sampler is not None:
+                        sampler.stop()
+        finally:
+            _state.sample = None
+        wall = time.perf_counter() - start
+        save(sample, request.path, wall, profile, sampler)
+        return response
+
+
+def save(sample, path, wall, profile=None, sampler=None):
+    directory = settings.PROFILING_DIR
+    now = time.time()
+    dump = None
+    if profile is not None or sampler is not None:
+        extension = 'prof' if profile is not None else 'collapsed'
+        dump = os.path.join(
+            sample.view, f'{now:.6f}-{os.getpid()}.{extension}'
+        )
+        os.makedirs(os.path.join(directory, sample.view), exist_ok=True)
+        if profile is not None:
+            profile.dump_stats(os.path.join(directory, dump))
+        else:
+            with open(os.path.join(directory, dump), 'w') as file:
+                for stack, count in sampler.stacks.items():
+                    file.write(f'{stack} {count}\n')
+    timings = {name: seconds * 1000
+               for name, seconds in sample.timings.items()}
+    record = {
+        'view': sample.view,
+        'path': path,
+        'time': now,
+        'wall_ms': wall * 1000,
+        'db_ms': timings.get('db', 0.0),
+        'templates_ms': timings.get('templates', 0.0),
+        'sections_ms': {
+            name: value for name, value in timings.items()
+            if name not in ('db', 'templates')
+        },
+        'other_ms': max(wall * 1000 - sum(timings.values()), 0.0),
+        'queries': sample.queries,
+        'templates': {
+            name: seconds * 1000
+            for name, seconds in sample.templates.items()
+        },
+        'dump': dump,
+    }
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, SAMPLES_FILE), 'a') as file:
+        file.write(json.dumps(record) + '\n')
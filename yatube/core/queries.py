@@ -0,0 +1,92 @@
+"""Per-request SQL query budgets and N+1 detection.
+
+``QueryBudgetMiddleware`` counts the queries of every request on all
+databases. It reports a request that runs more queries than the view's
+budget, set with ``query_budget`` or ``QUERY_BUDGET``, or that repeats
+one query shape ``QUERY_REPEAT_LIMIT`` times or more, which is what an
+N+1 loop in a template looks like. ``QUERY_BUDGET_ACTION`` is "log" or
+"raise".
+"""
+import logging
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryLog:
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self, limit):
+        """Query shapes run at least ``limit`` times, with their counts."""
+        return {sql: times for sql, times in Counter(self.queries).items()
+                if times >= limit}
+
+
+@contextmanager
+def log_queries():
+    """Collect queries run on any database inside the block."""
+    log = QueryLog()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(log))
+        yield log
+
+
+def query_budget(budget):
+    """Declare how many queries a view may run."""
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+class QueryBudgetMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = settings.QUERY_BUDGET
+        with log_queries() as log:
+            response = self.get_response(request)
+        problems = []
+        if request.query_budget is not None and (
+                log.count > request.query_budget):
+            problems.append(
+                f'{log.count} queries, the budget is {request.query_budget}'
+            )
+        for sql, times in log.repeated(settings.QUERY_REPEAT_LIMIT).items():
+            problems.append(f'{times} times: {sql}')
+        if problems:
+            self.report(request, problems)
+        response['X-Query-Count'] = log.count
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(
+            view_func, 'query_budget', settings.QUERY_BUDGET
+        )
+
+    def report(self, request, problems):
+        message = f'{request.method} {request.path}: ' + '; '.join(problems)
+        if settings.QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,158 @@
+"""Static files for deployments without a separate web server.
+
+``collectstatic`` with ``CompressedManifestStaticFilesStorage`` stores
+every file under a content-hashed name and writes gzip and brotli
+variants next to it.
+``StaticFilesApplication`` wraps the WSGI application and serves those
+files, picking a precompressed variant the client accepts. Hashed names
+never change content, so they are cached for a year as immutable.
+"""
+import gzip
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from wsgiref.util import FileWrapper
+
+import brotli
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.json', '.svg', '.txt', '.html', '.xml',
+    '.ico', '.ttf', '.otf', '.eot',
+)
+# Variants in the order they are preferred, with their file suffix.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def compress(path, min_size=256):
+    """Write ``.gz`` and ``.br`` variants of a file worth compressing."""
+    if not path.endswith(COMPRESSIBLE):
+        return
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < min_size:
+        return
+    variants = {
+        '.gz': gzip.compress(data, compresslevel=9, mtime=0),
+        '.br': brotli.compress(data),
+    }
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set(paths)
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in names:
+            compress(self.path(name))
+
+
+class StaticFile:
+
+    def __init__(self, path, immutable, max_age):
+        self.path = path
+        stat = os.stat(path)
+        self.mtime = int(stat.st_mtime)
+        self.etag = f'"{self.mtime:x}-{stat.st_size:x}"'
+        self.variants = [
+            (encoding, path + suffix)
+            for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+        content_type, _ = mimetypes.guess_type(path)
+        if immutable:
+            cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            cache_control = f'public, max-age={max_age}'
+        self.headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Cache-Control', cache_control),
+            ('Last-Modified', formatdate(self.mtime, usegmt=True)),
+            ('ETag', self.etag),
+        ]
+        if self.variants:
+            self.headers.append(('Vary', 'Accept-Encoding'))
+
+    def is_fresh(self, environ):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return self.etag in if_none_match or if_none_match == '*'
+        if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return self.mtime <= since.timestamp()
+        return False
+
+    def choose(self, environ):
+        accepted = {
+            token.split(';')[0].strip()
+            for token in environ.get('HTTP_ACCEPT_ENCODING', '').split(',')
+        }
+        for encoding, path in self.variants:
+            if encoding in accepted:
+                return path, [('Content-Encoding', encoding)]
+        return self.path, []
+
+    def serve(self, environ, start_response):
+        if self.is_fresh(environ):
+            start_response('304 Not Modified', self.headers)
+            return []
+        path, extra = self.choose(environ)
+        headers = self.headers + extra + [
+            ('Content-Length', str(os.path.getsize(path)))
+        ]
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(path, 'rb'), 64 * 1024)
+
+
+class StaticFilesApplication:
+    """Serve files collected into ``root`` under the ``prefix`` URL.
+
+    Files are indexed once at startup, so restart after collectstatic.
+    """
+
+    def __init__(self, application, root, prefix, max_age=60):
+        self.application = application
+        self.files = {}
+        if root and prefix.startswith('/') and os.path.isdir(root):
+            self.files = self.scan(root, prefix, max_age)
+
+    def scan(self, root, prefix, max_age):
+        hashed = set()
+        storage = CompressedManifestStaticFilesStorage(location=root)
+        if os.path.isfile(os.path.join(root, storage.manifest_name)):
+            hashed = set(storage.load_manifest().values())
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                    continue
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                files[prefix + relative] = StaticFile(
+                    path, relative in hashed, max_age
+                )
+        return files
+
+    def __call__(self, environ, start_response):
+        static = self.files.get(environ.get('PATH_INFO', ''))
+        if static is None or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+        return static.serve(environ, start_response)
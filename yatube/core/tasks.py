@@ -0,0 +1,179 @@
+"""Background tasks stored in the database.
+
+Functions decorated with ``task`` get an ``enqueue`` method that adds a
+``Task`` row in the current transaction, so a task exists exactly when
+the write that caused it is committed. A task with an idempotency
+``key`` that is already queued, running or done is not added again;
+a task that failed for good frees its key, and so does a done task
+declared with ``keep_key=False``. The ``run_tasks`` command
+runs due tasks on a pool of threads, each in its own transaction. A
+failed task is retried ``TASKS_MAX_ATTEMPTS`` times with exponential
+backoff, then kept as failed. Claimed tasks are leased for
+``TASKS_LEASE`` seconds, so a task of a worker that died is run again.
+Tasks must be safe to run twice.
+
+With ``TASKS_EAGER`` tasks run inline where they are enqueued, which is
+how development and tests work without a worker.
+"""
+import json
+import logging
+import threading
+import time
+import traceback
+from concurrent import futures
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 60 * 60
+
+
+def task(func=None, *, keep_key=True):
+    """Make ``func`` a task, ``func.enqueue(*args, key=None, **kwargs)``.
+
+    Arguments must be JSON serializable. With ``keep_key=False`` a key
+    only keeps calls from being queued twice until the task is done.
+    """
+    if func is None:
+        return partial(task, keep_key=keep_key)
+    func.task_name = f'{func.__module__}.{func.__qualname__}'
+    func.enqueue = partial(enqueue, func)
+    func.keep_key = keep_key
+    return func
+
+
+def enqueue(func, *args, key=None, **kwargs):
+    """Queue a call of task ``func``, the new ``Task`` or None."""
+    if settings.TASKS_EAGER:
+        func(*args, **kwargs)
+        return None
+    try:
+        with transaction.atomic():
+            return Task.objects.create(
+                name=func.task_name,
+                arguments=json.dumps([args, kwargs]),
+                key=key
+            )
+    except IntegrityError:
+        if key is None:
+            raise
+        return None
+
+
+def backoff(attempts):
+    """Seconds before the retry of a task failed ``attempts`` times."""
+    delay = settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1)
+    return min(delay, settings.TASKS_RETRY_MAX_DELAY)
+
+
+def claim(limit):
+    """Lease up to ``limit`` due tasks to this worker."""
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.TASKS_LEASE)
+    due = Task.objects.filter(
+        status__in=(Task.QUEUED, Task.RUNNING), run_at__lte=now
+    )[:limit]
+    claimed = []
+    for found in due:
+        # Running tasks are due again when their lease has expired. The
+        # update only matches while no other worker has claimed the task.
+        if Task.objects.filter(
+                pk=found.pk, status=found.status, run_at=found.run_at
+        ).update(status=Task.RUNNING, run_at=lease,
+                 attempts=F('attempts') + 1):
+            found.status = Task.RUNNING
+            found.run_at = lease
+            found.attempts += 1
+            claimed.append(found)
+    return claimed
+
+
+def execute(claimed):
+    """Run a claimed task and finish, retry or fail it."""
+    # Once the lease is lost another worker owns the row.
+    leased = Task.objects.filter(pk=claimed.pk, run_at=claimed.run_at)
+    try:
+        func = import_string(claimed.name)
+        args, kwargs = json.loads(claimed.arguments)
+        with transaction.atomic():
+            func(*args, **kwargs)
+    except Exception:
+        logger.exception('Task %s %s failed', claimed.pk, claimed.name)
+        error = traceback.format_exc()
+        if claimed.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            # Failing frees the key, so the work can be queued again.
+            leased.update(status=Task.FAILED, key=None, error=error)
+            result = 'failed'
+        else:
+            retry_at = timezone.now() + timedelta(
+                seconds=backoff(claimed.attempts)
+            )
+            leased.update(status=Task.QUEUED, run_at=retry_at, error=error)
+            result = 'retried'
+    else:
+        if claimed.key is None or not func.keep_key:
+            leased.delete()
+        else:
+            # The row keeps the key taken until it is purged.
+            leased.update(status=Task.DONE, run_at=timezone.now(), error='')
+        result = 'done'
+    metrics.TASKS.inc(task=claimed.name, result=result)
+    return result
+
+
+def purge():
+    """Delete done tasks older than ``TASKS_KEEP_DONE`` seconds."""
+    before = timezone.now() - timedelta(seconds=settings.TASKS_KEEP_DONE)
+    Task.objects.filter(status=Task.DONE, run_at__lt=before).delete()
+
+
+def _run(claimed):
+    try:
+        execute(claimed)
+    except Exception:
+        logger.exception('Task %s could not be finished', claimed.pk)
+    finally:
+        connections.close_all()
+
+
+def work(workers=None, once=False, stop=None):
+    """Run due tasks on ``workers`` threads until ``stop`` is set.
+
+    With ``once`` return as soon as no task is due or running.
+    """
+    workers = workers or settings.TASKS_WORKERS
+    stop = stop or threading.Event()
+    running = set()
+    purged = None
+    with futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='tasks') as executor:
+        while not stop.is_set():
+            running = {future for future in running if not future.done()}
+            claimed = claim(workers - len(running))
+            for found in claimed:
+                running.add(executor.submit(_run, found))
+            if claimed:
+                continue
+            if running:
+                futures.wait(running, settings.TASKS_POLL_INTERVAL,
+                             futures.FIRST_COMPLETED)
+            elif once:
+                break
+            else:
+                if (purged is None
+                        or time.monotonic() - purged > PURGE_INTERVAL):
+                    purge()
+                    purged = time.monotonic()
+                stop.wait(settings.TASKS_POLL_INTERVAL)
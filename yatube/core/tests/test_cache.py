@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.cache import SQLiteCache
+
+User = get_user_model()
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = f'{self.directory}/cache.sqlite3'
+        self.cache = SQLiteCache(self.location, {
+            'KEY_PREFIX': 'test',
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2},
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_are_shared_between_instances(self):
+        """Second backend on the same file sees the same entries."""
+        other = SQLiteCache(self.location, {'KEY_PREFIX': 'test'})
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(other.get('key'), {'value': 1})
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_touch_and_expiry(self):
+        """Entries respect add semantics and timeouts."""
+        self.assertTrue(self.cache.add('key', 1, timeout=0.05))
+        self.assertFalse(self.cache.add('key', 2))
+        time.sleep(0.1)
+        self.assertFalse(self.cache.has_key('key'))
+        self.assertTrue(self.cache.add('key', 3, timeout=None))
+        self.assertTrue(self.cache.touch('key', 100))
+        self.assertEqual(self.cache.get('key'), 3)
+
+    def test_versions_and_prefix_separate_keys(self):
+        """Key prefix and version are part of the stored key."""
+        self.cache.set('key', 1, version=1)
+        self.assertIsNone(self.cache.get('key', version=2))
+        other = SQLiteCache(self.location, {'KEY_PREFIX': 'other'})
+        self.assertIsNone(other.get('key', version=1))
+
+    def test_cull_keeps_size_bounded(self):
+        """Old entries are removed over MAX_ENTRIES."""
+        for number in range(25):
+            self.cache.set(f'key-{number}', number)
+        self.assertLessEqual(self.cache.stats()['entries'], 10)
+        self.assertEqual(self.cache.get('key-24'), 24)
+
+    def test_stats(self):
+        """Hits and misses are counted."""
+        self.cache.set('key', 1)
+        self.cache.get('key')
+        self.cache.get('missing')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
+class CacheStatusViewTests(TestCase):
+    def test_cache_status(self):
+        """Status view reports healthy cache and hides stats from guests."""
+        response = Client().get(reverse('cache_status'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['healthy'])
+        self.assertEqual(response.json()['key_prefix'], 'yatube')
+        self.assertNotIn('stats', response.json())
@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import loaders
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class LoaderTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        self.reader = User.objects.create_user(username='Kuiil')
+        self.author = User.objects.create_user(username='IG-11')
+        self.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        for author in (self.reader, self.author, self.author):
+            Post.objects.create(author=author, group=self.group, text='Post')
+
+    def setUp(self):
+        self.loader = loaders.Loader()
+        loaders._state.loader = self.loader
+
+    def tearDown(self):
+        loaders._state.loader = None
+
+    def test_expected_rows_load_in_one_query(self):
+        """First access loads authors of every expected post at once."""
+        posts = list(Post.objects.order_by('pk'))
+        loaders.expect(posts, 'author', 'group')
+        with self.assertNumQueries(1):
+            authors = [post.author for post in posts]
+        self.assertEqual(authors, [self.reader, self.author, self.author])
+        self.assertIs(authors[1], authors[2])
+        with self.assertNumQueries(1):
+            groups = {id(post.group) for post in posts}
+        self.assertEqual(len(groups), 1)
+
+    def test_only_card_columns_are_loaded(self):
+        """Authors and groups of posts come without unused columns."""
+        post = Post.objects.get(author=self.reader)
+        loaders.expect([post], 'author', 'group')
+        self.assertIn('password', post.author.get_deferred_fields())
+        self.assertIn('description', post.group.get_deferred_fields())
+        with self.assertNumQueries(0):
+            self.assertEqual(str(post.author), 'Kuiil')
+            self.assertEqual(post.group.slug, 'test-slug')
+
+    def test_columns_are_kept_per_field(self):
+        """Fields load their own columns, known rows get the ones they lack."""
+        self.loader.get_many(User, [self.reader.pk])
+        posts = list(Post.objects.order_by('pk'))
+        loaders.expect(posts, 'author')
+        with self.assertNumQueries(1):
+            authors = [post.author for post in posts]
+        self.assertIn('password', authors[1].get_deferred_fields())
+        with self.assertNumQueries(1):
+            found = self.loader.get_many(User, [self.author.pk])
+        self.assertIs(found[self.author.pk], authors[1])
+        self.assertEqual(authors[1].get_deferred_fields(), set())
+
+    def test_known_rows_are_not_loaded(self):
+        """Rows already in the map, like the signed in user, are reused."""
+        loaders._state.loader = loaders.Loader(self.reader)
+        post = Post.objects.get(author=self.reader)
+        with self.assertNumQueries(0):
+            self.assertEqual(post.author, self.reader)
+        self.assertIs(post.author, self.reader)
+
+    def test_without_loader(self):
+        """Outside of requests foreign keys load one by one."""
+        loaders._state.loader = None
+        posts = list(Post.objects.all())
+        loaders.expect(posts, 'author')
+        with self.assertNumQueries(len(posts)):
+            for post in posts:
+                post.author
+
+    def test_feed_shares_instances(self):
+        """Posts of one author in a feed share the author instance."""
+        loaders._state.loader = None
+        Follow.objects.create(user=self.reader, author=self.author)
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        first, second = response.context['page_obj']
+        self.assertIs(first.author, second.author)
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+
+from django.http import Http404
+from django.test import Client, RequestFactory, TestCase, override_settings
+
+from core import media
+
+CONTENT = bytes(range(256)) * 4
+
+
+class MediaTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'cache'))
+        os.makedirs(os.path.join(self.root, 'posts'))
+        for name in ('cache/thumb.jpg', 'posts/image.jpg'):
+            with open(os.path.join(self.root, name), 'wb') as file:
+                file.write(CONTENT)
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = Client()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_file_is_served_with_validators(self):
+        """Media files are served with ETag and Last-Modified."""
+        response = self.client.get('/media/posts/image.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_unchanged_file_answers_not_modified(self):
+        """Conditional requests get 304."""
+        response = self.client.get('/media/posts/image.jpg')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        response = self.client.get(
+            '/media/posts/image.jpg', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            '/media/posts/image.jpg', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        """Byte ranges are answered with 206 or 416."""
+        cases = {
+            'bytes=0-9': (0, 9),
+            'bytes=1000-': (1000, 1023),
+            'bytes=-24': (1000, 1023),
+            'bytes=1020-5000': (1020, 1023),
+        }
+        for header, (first, last) in cases.items():
+            with self.subTest(range=header):
+                response = self.client.get(
+                    '/media/posts/image.jpg', HTTP_RANGE=header
+                )
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {first}-{last}/1024'
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    CONTENT[first:last + 1]
+                )
+        response = self.client.get(
+            '/media/posts/image.jpg', HTTP_RANGE='bytes=2000-'
+        )
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_stale_if_range_sends_whole_file(self):
+        """A range for an older version of the file is ignored."""
+        response = self.client.get(
+            '/media/posts/image.jpg',
+            HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"outdated"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_thumbnails_are_immutable(self):
+        """Thumbnails are cached for a long time, uploads for an hour."""
+        response = self.client.get('/media/cache/thumb.jpg')
+        self.assertIn('immutable', response['Cache-Control'])
+        response = self.client.get('/media/posts/image.jpg')
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_missing_and_outside_files_are_not_found(self):
+        """Missing files and paths outside MEDIA_ROOT give 404."""
+        response = self.client.get('/media/posts/missing.jpg')
+        self.assertEqual(response.status_code, 404)
+        with self.assertRaises(Http404):
+            media.serve(RequestFactory().get('/'), '../settings.py')
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect')
+    def test_transfer_is_offloaded(self):
+        """With offload the front server sends the file."""
+        response = self.client.get('/media/posts/image.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/image.jpg'
+        )
+        self.assertEqual(response.content, b'')
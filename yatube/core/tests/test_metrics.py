@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def current(sample, **labels):
+    return metrics.REGISTRY.collect().get(
+        (sample, tuple((name, str(value)) for name, value in labels.items())),
+        0
+    )
+
+
+class MetricsEndpointTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        self.user = User.objects.create_user(username='Fennec')
+        Post.objects.create(author=self.user, text='Measured post')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_request_and_cache_metrics(self):
+        """Requests, their queries and fragment cache lookups are counted."""
+        requests = current(
+            'yatube_requests_total',
+            view='posts:main_page', method='GET', status=200
+        )
+        Client().get(reverse('posts:main_page'))
+        Client().get(reverse('posts:main_page'))
+        response = Client().get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        self.assertEqual(current(
+            'yatube_requests_total',
+            view='posts:main_page', method='GET', status=200
+        ), requests + 2)
+        text = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', text)
+        self.assertIn(
+            'yatube_request_queries_bucket{view="posts:main_page",le="+Inf"}',
+            text
+        )
+        self.assertIn(
+            'yatube_cache_lookups_total{cache="template_fragments",'
+            'result="hit"}',
+            text
+        )
+        self.assertIn(
+            'yatube_cache_lookups_total{cache="template_fragments",'
+            'result="miss"}',
+            text
+        )
+
+    def test_other_addresses_are_forbidden(self):
+        """Only METRICS_ALLOWED_IPS may read the metrics."""
+        response = Client(REMOTE_ADDR='10.1.2.3').get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+    def test_upload_and_thumbnail_metrics(self):
+        """Uploaded image sizes and thumbnail generation are measured."""
+        uploads = current('yatube_upload_size_bytes_count')
+        thumbnails = current(
+            'yatube_thumbnail_generation_seconds_count', format='JPEG'
+        )
+        content = BytesIO()
+        Image.new('RGB', (640, 480), 'blue').save(content, 'JPEG')
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('posts:post_create'), {
+            'text': 'Post with image',
+            'image': SimpleUploadedFile(
+                'photo.jpg', content.getvalue(), 'image/jpeg'
+            ),
+        })
+        post = Post.objects.get(text='Post with image')
+        Template(
+            '{% load post_images %}{% post_picture post.image %}'
+        ).render(Context({'post': post}))
+        self.assertEqual(
+            current('yatube_upload_size_bytes_count'), uploads + 1
+        )
+        self.assertGreater(current(
+            'yatube_thumbnail_generation_seconds_count', format='JPEG'
+        ), thumbnails)
+
+    @classmethod
+    def tearDownClass(self):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+
+class RegistryTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.registry = metrics.Registry()
+        self.counter = metrics.Counter(
+            'test_total', 'Test counter.', ('kind',), registry=self.registry
+        )
+        self.histogram = metrics.Histogram(
+            'test_seconds', 'Test histogram.', buckets=(1, 5),
+            registry=self.registry
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Every bucket counts the observations up to its bound."""
+        for observed in (0.5, 3, 10):
+            self.histogram.observe(observed)
+        text = self.registry.exposition()
+        self.assertIn('test_seconds_bucket{le="1"} 1\n', text)
+        self.assertIn('test_seconds_bucket{le="5"} 2\n', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3\n', text)
+        self.assertIn('test_seconds_sum 13.5\n', text)
+        self.assertIn('test_seconds_count 3\n', text)
+
+    def test_label_names_are_checked(self):
+        """Counter refuses labels it was not declared with."""
+        with self.assertRaises(ValueError):
+            self.counter.inc(other='label')
+
+    def test_processes_are_summed(self):
+        """Values written by other worker processes are added up."""
+        with override_settings(METRICS_DIR=self.directory):
+            self.counter.inc(kind='post')
+            other = os.path.join(self.directory, '1-other.json')
+            with open(other, 'w') as file:
+                json.dump([['test_total', [['kind', 'post']], 2]], file)
+            text = self.registry.exposition()
+            self.assertTrue(os.path.isfile(
+                os.path.join(self.directory, self.registry.name)
+            ))
+        self.assertIn('test_total{kind="post"} 3\n', text)
@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        self.user = User.objects.create_user(username='Migs')
+        self.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        Post.objects.create(
+            author=self.user, group=self.group, text='Profiled post'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(
+            PROFILING_SAMPLE_RATE=1, PROFILING_DIR=self.directory
+        )
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def samples(self):
+        path = os.path.join(self.directory, profiling.SAMPLES_FILE)
+        with open(path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_sample_splits_wall_time(self):
+        """Sampled request records queries and time per template."""
+        Client().get(reverse('posts:main_page'))
+        sample, = self.samples()
+        self.assertEqual(sample['view'], 'posts.views.index')
+        self.assertGreater(sample['queries'], 0)
+        self.assertGreater(sample['db_ms'], 0)
+        self.assertIn('posts/includes/post.html', sample['templates'])
+        self.assertIn(
+            'posts/includes/paginator.html', sample['templates']
+        )
+        self.assertLessEqual(
+            sample['db_ms'] + sample['templates_ms'], sample['wall_ms']
+        )
+
+    def test_other_views_are_not_sampled(self):
+        """Views outside PROFILING_VIEWS are not profiled."""
+        Client().get(reverse('about:author'))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, profiling.SAMPLES_FILE)
+        ))
+
+    @override_settings(PROFILING_OUTPUT='pstats')
+    def test_pstats_report(self):
+        """cProfile dumps are aggregated into the report."""
+        client = Client()
+        client.get(reverse('posts:main_page'))
+        client.get(reverse('posts:group_list', args=[self.group.slug]))
+        for sample in self.samples():
+            self.assertTrue(os.path.isfile(
+                os.path.join(self.directory, sample['dump'])
+            ))
+        out = StringIO()
+        call_command('profile_report', dir=self.directory, stdout=out)
+        self.assertIn('posts.views.index: 1 samples', out.getvalue())
+        self.assertIn('posts.views.group_posts', out.getvalue())
+        self.assertIn('cumulative', out.getvalue())
+
+    @override_settings(PROFILING_OUTPUT='collapsed', PROFILING_INTERVAL=0)
+    def test_collapsed_stacks(self):
+        """Stack samples are saved in collapsed format."""
+        Client().get(reverse('posts:main_page'))
+        sample, = self.samples()
+        with open(os.path.join(self.directory, sample['dump'])) as file:
+            stack, count = file.readline().rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        out = StringIO()
+        call_command('profile_report', dir=self.directory, stdout=out)
+        self.assertTrue(os.path.isfile(
+            os.path.join(self.directory, 'posts.views.index.collapsed')
+        ))
+
+    def test_nested_sections_are_counted_once(self):
+        """Time of a nested section is not counted in the outer one."""
+        sample = profiling.Sample('view')
+        with sample.section('templates'):
+            with sample.section('db'):
+                pass
+        self.assertGreater(sample.timings['db'], 0)
+        self.assertGreater(sample.timings['templates'], 0)
+        self.assertEqual(sample._stack, [])
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.queries import (QueryBudgetExceeded, QueryBudgetMiddleware,
+                          query_budget)
+
+User = get_user_model()
+
+
+@query_budget(1)
+def one_user(request):
+    User.objects.first()
+    return HttpResponse()
+
+
+@query_budget(10)
+def users_one_by_one(request):
+    for username in ('Din', 'Din', 'Din'):
+        User.objects.filter(username=username).first()
+    return HttpResponse()
+
+
+def two_users(request):
+    User.objects.first()
+    User.objects.last()
+    return HttpResponse()
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+
+    def get(self, view):
+        request = RequestFactory().get('/')
+        middleware = QueryBudgetMiddleware(view)
+        middleware.process_view(request, view, (), {})
+        return middleware(request)
+
+    @override_settings(QUERY_BUDGET_ACTION='raise')
+    def test_view_within_budget(self):
+        """Request within the budget passes and reports its query count."""
+        response = self.get(one_user)
+        self.assertEqual(response['X-Query-Count'], '1')
+
+    @override_settings(QUERY_BUDGET_ACTION='raise', QUERY_BUDGET=1)
+    def test_over_budget_raises(self):
+        """Request over the default budget raises in raise mode."""
+        with self.assertRaisesMessage(QueryBudgetExceeded, '2 queries'):
+            self.get(two_users)
+
+    @override_settings(QUERY_BUDGET_ACTION='raise', QUERY_REPEAT_LIMIT=3)
+    def test_repeated_query_raises(self):
+        """Same query shape run repeatedly is reported as N+1."""
+        with self.assertRaisesMessage(QueryBudgetExceeded, '3 times'):
+            self.get(users_one_by_one)
+
+    @override_settings(QUERY_BUDGET_ACTION='log', QUERY_BUDGET=1)
+    def test_over_budget_logs(self):
+        """Request over the budget is logged in log mode."""
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            response = self.get(two_users)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('the budget is 1', logs.output[0])
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.replicas import PIN_COOKIE
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Primary is the test database, the replica is a snapshot of it."""
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.author = User.objects.create_user(username='Bo-Katan')
+        Post.objects.create(author=self.author, text='Replicated post')
+        replica = os.path.join(self.directory, 'replica.sqlite3')
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM INTO %s', [replica])
+        connections.databases['replica'] = {
+            **connection.settings_dict, 'NAME': replica
+        }
+        self.client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def tearDown(self):
+        connections['replica'].close()
+        del connections.databases['replica']
+        delattr(connections._connections, 'replica')
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def texts(self, client):
+        response = client.get(reverse('posts:main_page'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_feeds_are_read_from_replica(self):
+        """Readers see the replica, which lags behind the primary."""
+        Post.objects.create(author=self.author, text='Not replicated yet')
+        self.assertEqual(self.texts(self.client), ['Replicated post'])
+
+    def test_writer_reads_from_primary(self):
+        """After writing, the author sees the new post on the primary."""
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Fresh post'}
+        )
+        self.assertIn(PIN_COOKIE, self.author_client.cookies)
+        self.assertEqual(
+            self.texts(self.author_client), ['Fresh post', 'Replicated post']
+        )
+        self.assertEqual(self.texts(self.client), ['Replicated post'])
+
+    def test_writes_go_to_primary(self):
+        """Posts created while reading a replica land on the primary."""
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Fresh post'}
+        )
+        self.assertTrue(Post.objects.filter(text='Fresh post').exists())
@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.signals import tune_sqlite
+
+PRINT_PROFILE = '''
+import json
+from django.conf import settings
+print(json.dumps({
+    'debug': settings.DEBUG,
+    'apps': settings.INSTALLED_APPS,
+    'middleware': settings.MIDDLEWARE,
+    'loaders': settings.TEMPLATES[0]['OPTIONS'].get('loaders'),
+    'conn_max_age': settings.DATABASES['default'].get('CONN_MAX_AGE'),
+    'pragmas': settings.SQLITE_PRAGMAS,
+    'cache': settings.CACHES['default']['CACHE_BACKEND'],
+}))
+'''
+
+
+class SettingsProfileTests(SimpleTestCase):
+    def load(self, profile, **variables):
+        environment = {
+            **os.environ,
+            'YATUBE_ENV': profile,
+            'YATUBE_SECRET_KEY': 'secret',
+            'DJANGO_SETTINGS_MODULE': 'yatube.settings',
+        }
+        environment.pop('YATUBE_CACHE', None)
+        environment.update(variables)
+        output = subprocess.run(
+            [sys.executable, '-c', PRINT_PROFILE],
+            cwd=settings.BASE_DIR, env=environment,
+            capture_output=True, check=True, text=True
+        ).stdout
+        return json.loads(output)
+
+    def test_dev_profile_has_debug_toolbar(self):
+        """Development profile runs with DEBUG and the toolbar."""
+        profile = self.load('dev')
+        self.assertTrue(profile['debug'])
+        self.assertIn('debug_toolbar', profile['apps'])
+
+    def test_prod_profile_is_tuned(self):
+        """Production profile drops the toolbar and tunes templates and db."""
+        profile = self.load('prod')
+        self.assertFalse(profile['debug'])
+        self.assertNotIn('debug_toolbar', profile['apps'])
+        self.assertFalse(
+            any('debug_toolbar' in name for name in profile['middleware'])
+        )
+        self.assertEqual(
+            profile['loaders'][0][0], 'django.template.loaders.cached.Loader'
+        )
+        self.assertGreater(profile['conn_max_age'], 0)
+        self.assertEqual(profile['pragmas']['journal_mode'], 'WAL')
+        self.assertEqual(profile['cache'], 'core.cache.SQLiteCache')
+
+    def test_cache_backend_can_be_chosen(self):
+        """YATUBE_CACHE overrides the cache backend of a profile."""
+        self.assertEqual(
+            self.load('dev')['cache'],
+            'django.core.cache.backends.locmem.LocMemCache'
+        )
+        self.assertEqual(
+            self.load('prod', YATUBE_CACHE='memcached')['cache'],
+            'django.core.cache.backends.memcached.MemcachedCache'
+        )
+
+
+class SQLitePragmasTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234})
+    def test_pragmas_are_applied_to_connections(self):
+        """SQLITE_PRAGMAS are run on new connections."""
+        tune_sqlite(sender=connection.__class__, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -1234)
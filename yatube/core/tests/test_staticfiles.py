@@ -0,0 +1,115 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+from wsgiref.util import setup_testing_defaults
+
+import brotli
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.staticfiles import StaticFilesApplication
+
+STYLE = 'body { color: black; }\n' * 50
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, 'source')
+        self.root = os.path.join(self.directory, 'root')
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as file:
+            file.write(STYLE)
+        with override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE=(
+                'core.staticfiles.CompressedManifestStaticFilesStorage'
+            ),
+            INSTALLED_APPS=['django.contrib.staticfiles'],
+        ):
+            call_command('collectstatic', interactive=False,
+                         stdout=StringIO())
+        self.application = StaticFilesApplication(
+            self.fallback, self.root, '/static/', max_age=60
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def fallback(self, environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def request(self, path, **headers):
+        environ = {'PATH_INFO': path, **headers}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.application(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def hashed_name(self):
+        (name,) = [name for name in os.listdir(os.path.join(self.root, 'css'))
+                   if name.startswith('site.') and name.endswith('.css')
+                   and name != 'site.css']
+        return f'/static/css/{name}'
+
+    def test_collectstatic_writes_compressed_variants(self):
+        """Collected files get hashed names, gzip and brotli variants."""
+        path = os.path.join(self.root, self.hashed_name()[len('/static/'):])
+        with gzip.open(path + '.gz') as file:
+            self.assertEqual(file.read().decode(), STYLE)
+        with open(path + '.br', 'rb') as file:
+            self.assertEqual(brotli.decompress(file.read()).decode(), STYLE)
+
+    def test_hashed_files_are_immutable(self):
+        """Hashed files are cached for a year, plain names briefly."""
+        _, headers, _ = self.request(self.hashed_name())
+        self.assertIn('immutable', headers['Cache-Control'])
+        _, headers, _ = self.request('/static/css/site.css')
+        self.assertEqual(headers['Cache-Control'], 'public, max-age=60')
+
+    def test_precompressed_variant_is_served(self):
+        """Clients accepting gzip get the precompressed file."""
+        status, headers, body = self.request(
+            self.hashed_name(), HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(body).decode(), STYLE)
+        _, headers, body = self.request(self.hashed_name())
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body.decode(), STYLE)
+
+    def test_brotli_is_preferred(self):
+        """Clients accepting brotli get the brotli variant."""
+        status, headers, body = self.request(
+            self.hashed_name(), HTTP_ACCEPT_ENCODING='gzip, deflate, br'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(body).decode(), STYLE)
+
+    def test_unchanged_file_answers_not_modified(self):
+        """Requests with a current ETag get 304."""
+        _, headers, _ = self.request(self.hashed_name())
+        status, _, body = self.request(
+            self.hashed_name(), HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_other_paths_reach_django(self):
+        """Unknown paths are passed to the wrapped application."""
+        _, _, body = self.request('/static/missing.css')
+        self.assertEqual(body, b'django')
+        _, _, body = self.request('/')
+        self.assertEqual(body, b'django')
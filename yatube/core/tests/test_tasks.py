@@ -0,0 +1,168 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+CALLS = []
+
+
+@tasks.task
+def record(value):
+    CALLS.append(value)
+
+
+@tasks.task(keep_key=False)
+def refresh(value):
+    CALLS.append(value)
+
+
+@tasks.task
+def fail():
+    raise ValueError('Task failed')
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_DELAY=10,
+                   TASKS_RETRY_MAX_DELAY=3600, TASKS_MAX_ATTEMPTS=3)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def run_due(self):
+        return [tasks.execute(claimed) for claimed in tasks.claim(10)]
+
+    def test_enqueue_adds_task(self):
+        """Enqueued call is stored and runs once claimed."""
+        task = record.enqueue('value')
+        self.assertEqual(task.name, 'core.tests.test_tasks.record')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(self.run_due(), ['done'])
+        self.assertEqual(CALLS, ['value'])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_task_runs_inline(self):
+        """Eager tasks run at once without a row."""
+        self.assertIsNone(record.enqueue('value'))
+        self.assertEqual(CALLS, ['value'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_key_is_queued_once(self):
+        """Task with a taken key is not queued again, even when done."""
+        self.assertIsNotNone(record.enqueue('first', key='record'))
+        self.assertIsNone(record.enqueue('second', key='record'))
+        self.run_due()
+        self.assertIsNone(record.enqueue('third', key='record'))
+        self.run_due()
+        self.assertEqual(CALLS, ['first'])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_done_task_can_free_its_key(self):
+        """Key of a task not keeping it is free again once it is done."""
+        self.assertIsNotNone(refresh.enqueue('first', key='refresh'))
+        self.assertIsNone(refresh.enqueue('second', key='refresh'))
+        self.run_due()
+        self.assertFalse(Task.objects.exists())
+        self.assertIsNotNone(refresh.enqueue('third', key='refresh'))
+        self.run_due()
+        self.assertEqual(CALLS, ['first', 'third'])
+
+    def test_claimed_task_is_leased(self):
+        """Claimed task is not claimed again until its lease expires."""
+        record.enqueue('value')
+        self.assertEqual(len(tasks.claim(10)), 1)
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        claimed, = tasks.claim(10)
+        self.assertEqual(claimed.attempts, 2)
+
+    def test_failed_task_is_retried_with_backoff(self):
+        """Failed task is queued again later, then kept as failed."""
+        fail.enqueue()
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(self.run_due(), ['retried'])
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertIn('ValueError: Task failed', task.error)
+        self.assertGreater(task.run_at, timezone.now() + timedelta(seconds=9))
+        for result in ('retried', 'failed'):
+            Task.objects.update(run_at=timezone.now())
+            with self.assertLogs('core.tasks', 'ERROR'):
+                self.assertEqual(self.run_due(), [result])
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+        self.assertEqual(tasks.claim(10), [])
+
+    def test_failed_task_frees_its_key(self):
+        """Key of a task that failed for good can be queued again."""
+        fail.enqueue(key='fail')
+        for attempt in range(3):
+            Task.objects.update(run_at=timezone.now())
+            with self.assertLogs('core.tasks', 'ERROR'):
+                self.run_due()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertIsNone(task.key)
+        self.assertIsNotNone(fail.enqueue(key='fail'))
+
+    def test_backoff_doubles_up_to_the_limit(self):
+        """Retry delay doubles with every attempt up to the maximum."""
+        self.assertEqual(
+            [tasks.backoff(attempts) for attempts in (1, 2, 3, 20)],
+            [10, 20, 40, 3600]
+        )
+
+    def test_purge_deletes_old_done_tasks(self):
+        """Done tasks are deleted once they are older than kept."""
+        record.enqueue('old', key='old')
+        record.enqueue('new', key='new')
+        self.run_due()
+        Task.objects.filter(key='old').update(
+            run_at=timezone.now() - timedelta(days=8)
+        )
+        tasks.purge()
+        self.assertEqual(
+            list(Task.objects.values_list('key', flat=True)), ['new']
+        )
+
+
+@override_settings(TASKS_EAGER=False)
+class RunTasksCommandTests(TransactionTestCase):
+    """Workers use a file copy of the test database.
+
+    Tables of the shared in-memory database fail with "table is locked"
+    at once when threads use them together, instead of waiting.
+    """
+
+    def setUp(self):
+        CALLS.clear()
+        self.directory = tempfile.mkdtemp()
+        copy = os.path.join(self.directory, 'tasks.sqlite3')
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM INTO %s', [copy])
+        self.memory = connections['default']
+        connections.databases['default'] = {
+            **self.memory.settings_dict, 'NAME': copy
+        }
+        delattr(connections._connections, 'default')
+
+    def tearDown(self):
+        connections['default'].close()
+        connections.databases['default'] = self.memory.settings_dict
+        connections._connections.default = self.memory
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_worker_runs_due_tasks(self):
+        """Worker threads run every due task and exit when done."""
+        for value in range(5):
+            record.enqueue(value)
+        call_command('run_tasks', workers=2, once=True, stdout=StringIO())
+        self.assertEqual(sorted(CALLS), list(range(5)))
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class RequestIdTests(TestCase):
+
+    def test_new_request_id(self):
+        """Every response gets a request ID."""
+        response = Client().get(reverse('about:author'))
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_request_id_is_propagated(self):
+        """Request ID set by a proxy is returned, a malformed one replaced."""
+        response = Client().get(
+            reverse('about:author'), HTTP_X_REQUEST_ID='proxy-1234'
+        )
+        self.assertEqual(response['X-Request-ID'], 'proxy-1234')
+        response = Client().get(
+            reverse('about:author'), HTTP_X_REQUEST_ID='bad id\n'
+        )
+        self.assertNotEqual(response['X-Request-ID'], 'bad id\n')
+
+
+class TracingTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        self.user = User.objects.create_user(username='Cobb')
+        self.post = Post.objects.create(author=self.user, text='Traced post')
+        Comment.objects.create(post=self.post, author=self.user, text='Hi')
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.file = os.path.join(self.directory, 'traces.jsonl')
+        self.settings = override_settings(TRACING_FILE=self.file)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def spans(self):
+        with open(self.file) as file:
+            export, = [json.loads(line) for line in file]
+        resource_spans, = export['resourceSpans']
+        self.assertEqual(
+            resource_spans['resource']['attributes'][0]['key'],
+            'service.name'
+        )
+        scope_spans, = resource_spans['scopeSpans']
+        return scope_spans['spans']
+
+    def test_request_is_traced(self):
+        """View, SQL, template and comments spans form one tree."""
+        response = Client().get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        spans = self.spans()
+        by_name = {span['name']: span for span in spans}
+        server = by_name['GET posts/<int:post_id>/']
+        self.assertEqual(server['kind'], 2)
+        self.assertNotIn('parentSpanId', server)
+        self.assertIn(
+            {'key': 'http.request_id',
+             'value': {'stringValue': response['X-Request-ID']}},
+            server['attributes']
+        )
+        view = by_name['view posts.views.post_detail']
+        self.assertEqual(view['parentSpanId'], server['spanId'])
+        for name in ('comments', 'template posts/post_detail.html',
+                     'template posts/includes/comments.html',
+                     'SELECT default'):
+            with self.subTest(name=name):
+                self.assertIn(name, by_name)
+        ids = {span['spanId'] for span in spans}
+        for span in spans:
+            self.assertEqual(span['traceId'], server['traceId'])
+            if span is not server:
+                self.assertIn(span['parentSpanId'], ids)
+            self.assertLessEqual(
+                int(span['startTimeUnixNano']), int(span['endTimeUnixNano'])
+            )
+
+    def test_cache_is_traced(self):
+        """Reads of cached post cards get spans."""
+        Client().get(reverse('posts:main_page'))
+        self.assertIn('cache.get', {span['name'] for span in self.spans()})
+
+    def test_traceparent_continues_trace(self):
+        """W3C traceparent header makes the request part of that trace."""
+        trace_id = '4bf92f3577b34da6a3ce929d0e0e4736'
+        Client().get(
+            reverse('posts:main_page'),
+            HTTP_TRACEPARENT=f'00-{trace_id}-00f067aa0ba902b7-01'
+        )
+        server, = [span for span in self.spans() if span['kind'] == 2]
+        self.assertEqual(server['traceId'], trace_id)
+        self.assertEqual(server['parentSpanId'], '00f067aa0ba902b7')
+
+    @override_settings(TRACING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_traced(self):
+        """Requests outside the sample only get a request ID."""
+        response = Client().get(reverse('posts:main_page'))
+        self.assertIn('X-Request-ID', response)
+        self.assertFalse(os.path.exists(self.file))
@@ -0,0 +1,252 @@
+"""Request IDs and tracing of requests in the OpenTelemetry span model.
+
+``TracingMiddleware`` gives every request an ID, the one a proxy passed
+in the ``TRACING_REQUEST_ID_HEADER`` header or a new one, and returns it
+in the same response header. With ``TRACING_FILE`` it also traces a
+``TRACING_SAMPLE_RATE`` fraction of requests: a server span, a span of
+the view and spans of every SQL query, rendered template, cache call
+and ``span`` block. Every trace is appended to the file as one line of
+OTLP/JSON, which the OpenTelemetry collector reads with its
+``otlpjsonfile`` receiver. A W3C ``traceparent`` header continues the
+trace of the caller.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+STATUS_ERROR = 2
+
+REQUEST_ID_RE = re.compile(r'^[\w.:-]{1,200}$')
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+_state = threading.local()
+_lock = threading.Lock()
+_installed = False
+
+
+def new_id(size):
+    return os.urandom(size).hex()
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_attributes(attributes):
+    return [{'key': key, 'value': otlp_value(value)}
+            for key, value in attributes.items()]
+
+
+class Span:
+
+    def __init__(self, trace_id, name, kind, parent_id, attributes):
+        self.trace_id = trace_id
+        self.span_id = new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.error = False
+        self.start = time.time_ns()
+        self.end = None
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': otlp_attributes(self.attributes),
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.error:
+            span['status'] = {'code': STATUS_ERROR}
+        return span
+
+
+class Trace:
+    """Spans of one request, nested by the order they are opened."""
+
+    def __init__(self, trace_id=None, parent_id=None):
+        self.trace_id = trace_id or new_id(16)
+        self.parent_id = parent_id
+        self.spans = []
+        self.open = []
+
+    def start(self, name, kind=INTERNAL, attributes=None):
+        parent_id = self.open[-1].span_id if self.open else self.parent_id
+        span = Span(self.trace_id, name, kind, parent_id, attributes)
+        self.open.append(span)
+        return span
+
+    def end(self, span):
+        span.end = time.time_ns()
+        self.open.remove(span)
+        self.spans.append(span)
+
+    def to_otlp(self):
+        return {'resourceSpans': [{
+            'resource': {'attributes': otlp_attributes(
+                {'service.name': settings.TRACING_SERVICE_NAME}
+            )},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in self.spans],
+            }],
+        }]}
+
+
+def current():
+    return getattr(_state, 'trace', None)
+
+
+@contextmanager
+def span(name, kind=INTERNAL, attributes=None):
+    """Trace the block as a span when the request is traced."""
+    trace = current()
+    if trace is None:
+        yield None
+        return
+    opened = trace.start(name, kind, attributes)
+    try:
+        yield opened
+    except Exception:
+        opened.error = True
+        raise
+    finally:
+        trace.end(opened)
+
+
+def trace_query(execute, sql, params, many, context):
+    connection = context['connection']
+    operation = sql.split(None, 1)[0].upper() if sql else 'SQL'
+    with span(f'{operation} {connection.alias}', CLIENT, {
+        'db.system': connection.vendor,
+        'db.name': connection.alias,
+        'db.operation': operation,
+        'db.statement': sql,
+    }):
+        return execute(sql, params, many, context)
+
+
+def install():
+    """Trace template rendering, including ``{% include %}``."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    render_template = Template.render
+
+    def render(self, context):
+        if current() is None:
+            return render_template(self, context)
+        name = self.origin.template_name or '<string>'
+        with span(f'template {name}', attributes={'template.name': name}):
+            return render_template(self, context)
+
+    Template.render = render
+
+
+def export(trace):
+    line = json.dumps(trace.to_otlp(), separators=(',', ':')) + '\n'
+    # One write to a file opened for appending keeps lines of processes
+    # writing at the same time apart.
+    with _lock:
+        descriptor = os.open(
+            settings.TRACING_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o644
+        )
+        try:
+            os.write(descriptor, line.encode())
+        finally:
+            os.close(descriptor)
+
+
+def request_id(request):
+    header = 'HTTP_' + settings.TRACING_REQUEST_ID_HEADER.upper().replace(
+        '-', '_'
+    )
+    incoming = request.META.get(header, '')
+    if REQUEST_ID_RE.match(incoming):
+        return incoming
+    return new_id(16)
+
+
+class TracingMiddleware:
+    """Request IDs and traces, should follow ``MetricsMiddleware``.
+
+    The view span also covers the response phase of middleware listed
+    after this one.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if settings.TRACING_FILE:
+            install()
+
+    def __call__(self, request):
+        request.request_id = request_id(request)
+        if (settings.TRACING_FILE
+                and random.random() < settings.TRACING_SAMPLE_RATE):
+            response = self.trace(request)
+        else:
+            response = self.get_response(request)
+        response[settings.TRACING_REQUEST_ID_HEADER] = request.request_id
+        return response
+
+    def trace(self, request):
+        match = TRACEPARENT_RE.match(request.META.get('HTTP_TRACEPARENT', ''))
+        trace = Trace(*match.groups()) if match else Trace()
+        _state.trace = trace
+        try:
+            server = trace.start(request.method, SERVER, {
+                'http.method': request.method,
+                'http.target': request.get_full_path(),
+                'http.request_id': request.request_id,
+            })
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(trace_query)
+                    )
+                response = self.get_response(request)
+            # Close the view span and whatever else is left inside.
+            while trace.open[-1] is not server:
+                trace.end(trace.open[-1])
+            match = request.resolver_match
+            if match is not None:
+                server.name = f'{request.method} {match.route}'
+                server.attributes['http.route'] = match.route
+            server.attributes['http.status_code'] = response.status_code
+            server.error = response.status_code >= 500
+            trace.end(server)
+        finally:
+            _state.trace = None
+        export(trace)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trace = current()
+        if trace is not None:
+            view = f'{view_func.__module__}.{view_func.__name__}'
+            trace.start(f'view {view}', attributes={'code.function': view})
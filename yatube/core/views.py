@@ -1,5 +1,13 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +23,34 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def cache_status(request):
+    """Health of the default cache, with statistics for staff."""
+    probe = f'health:{uuid4().hex}'
+    try:
+        cache.set(probe, probe, 10)
+        healthy = cache.get(probe) == probe
+        cache.delete(probe)
+    except Exception:
+        healthy = False
+    data = {
+        'healthy': healthy,
+        'backend': settings.CACHES['default'].get(
+            'CACHE_BACKEND', settings.CACHES['default']['BACKEND']
+        ),
+        'key_prefix': cache.key_prefix,
+        'version': cache.version,
+    }
+    if request.user.is_staff and hasattr(cache, 'stats'):
+        data['stats'] = cache.stats()
+    return JsonResponse(data, status=200 if healthy else 503)
+
+
+def metrics_exposition(request):
+    """Metrics of all worker processes in the Prometheus text format."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.REGISTRY.exposition(), content_type=metrics.CONTENT_TYPE
+    )
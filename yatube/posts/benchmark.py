@@ -0,0 +1,164 @@
+"""Benchmarks of the hot views on seeded data.
+
+``seed`` fills the database with random users, groups, posts, comments
+and follows through ``mixer``. ``run`` requests every view in ``VIEWS``
+through the test client and measures latency percentiles, queries and
+peak allocated memory. ``compare`` lists the metrics that got worse than
+a baseline run. See the ``benchmark`` management command.
+"""
+import random
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from core.queries import log_queries
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+VIEWS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+    'add_comment',
+)
+PERCENTILES = (50, 90, 99)
+
+
+def seed(users=50, groups=10, posts=1000, comments=3000, follows=500,
+         random_seed=None):
+    """Create random content, ``follows`` is capped by distinct pairs."""
+    rand = random.Random(random_seed)
+    users = list(mixer.cycle(users).blend(User))
+    groups = list(mixer.cycle(groups).blend(Group))
+    posts = list(mixer.cycle(posts).blend(
+        Post,
+        author=(rand.choice(users) for _ in range(posts)),
+        group=(rand.choice(groups + [None]) for _ in range(posts)),
+        image='',
+    ))
+    mixer.cycle(comments).blend(
+        Comment,
+        post=(rand.choice(posts) for _ in range(comments)),
+        author=(rand.choice(users) for _ in range(comments)),
+    )
+    pairs = [(user, author) for user in users for author in users
+             if user != author]
+    for user, author in rand.sample(pairs, min(follows, len(pairs))):
+        Follow.objects.create(user=user, author=author)
+
+
+def targets():
+    """Busiest object of every view: ``{view: (method, url, data)}``."""
+    group = Group.objects.annotate(
+        total=Count('posts')).order_by('-total').first()
+    author = User.objects.annotate(
+        total=Count('posts')).order_by('-total').first()
+    post = Post.objects.order_by('-comments_count').first()
+    return {
+        'index': ('get', reverse('posts:main_page'), None),
+        'group_posts': (
+            'get', reverse('posts:group_list', args=[group.slug]), None
+        ),
+        'profile': (
+            'get', reverse('posts:profile', args=[author.username]), None
+        ),
+        'post_detail': (
+            'get', reverse('posts:post_detail', args=[post.pk]), None
+        ),
+        'follow_index': ('get', reverse('posts:follow_index'), None),
+        'add_comment': (
+            'post', reverse('posts:add_comment', args=[post.pk]),
+            {'text': 'Benchmark comment'}
+        ),
+    }
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    rank = max(round(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def measure(client, method, url, data, requests=50, cold=False):
+    """Latency, query count and peak memory of requests to ``url``.
+
+    ``cold`` clears the cache before every request.
+    """
+    request = getattr(client, method)
+    timings = []
+    queries = 0
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        with log_queries() as log:
+            start = time.perf_counter()
+            request(url, data)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, log.count)
+    # Tracing slows Python down, so memory is measured in its own request.
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        request(url, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'url': url,
+        'latency_ms': {
+            f'p{percent}': round(percentile(timings, percent), 3)
+            for percent in PERCENTILES
+        },
+        'queries': queries,
+        'memory_kib': round(peak / 1024, 1),
+    }
+
+
+def run(requests=50, cold=False, views=VIEWS):
+    """Measure ``views`` as the user who follows the most authors."""
+    user = User.objects.annotate(
+        total=Count('follower')).order_by('-total').first()
+    client = Client()
+    client.force_login(user)
+    found = targets()
+    return {
+        view: measure(client, *found[view], requests=requests, cold=cold)
+        for view in views
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Metrics of ``results`` worse than in ``baseline``.
+
+    Latency and memory may grow by ``tolerance``, queries may not grow.
+    """
+    regressions = []
+    for view, current in results.items():
+        previous = baseline.get(view)
+        if previous is None:
+            continue
+        for name, value in current['latency_ms'].items():
+            before = previous['latency_ms'].get(name)
+            if before is not None and value > before * (1 + tolerance):
+                regressions.append(
+                    f'{view} {name}: {before} ms -> {value} ms'
+                )
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{view} queries: {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        memory = previous['memory_kib'] * (1 + tolerance)
+        if current['memory_kib'] > memory:
+            regressions.append(
+                f'{view} memory: {previous["memory_kib"]} KiB -> '
+                f'{current["memory_kib"]} KiB'
+            )
+    return regressions
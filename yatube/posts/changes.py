@@ -0,0 +1,51 @@
+"""Version of published content.
+
+New posts show up in the latest ``pub_date`` of a feed, but edits,
+comments, deletions and follows do not, so they move the version kept
+in a single database row. Unlike a cache entry it is never evicted and
+every worker process reads the same one.
+"""
+from datetime import datetime, timezone
+
+from django.db.models import F, Max
+
+from .models import ContentVersion
+
+PK = 1
+NEVER = (0, datetime.fromtimestamp(0, timezone.utc))
+
+
+def touch():
+    stamp = ContentVersion.objects.filter(pk=PK)
+    now = datetime.now(timezone.utc)
+    if stamp.update(version=F('version') + 1, changed=now):
+        return
+    _, created = ContentVersion.objects.get_or_create(
+        pk=PK, defaults={'version': 1, 'changed': now}
+    )
+    if not created:
+        stamp.update(version=F('version') + 1, changed=now)
+
+
+def last_change():
+    """Version and time of the last change."""
+    return (
+        ContentVersion.objects.filter(pk=PK)
+        .values_list('version', 'changed').first()
+    ) or NEVER
+
+
+def latest(queryset, field='pub_date'):
+    """Newest ``field`` of a feed, read from an index."""
+    return queryset.order_by().aggregate(latest=Max(field))['latest']
+
+
+def state(newest=None):
+    """Version and modification time of content published up to ``newest``.
+
+    ``newest`` is the latest ``pub_date`` of a feed, see ``latest``.
+    """
+    version, last_modified = last_change()
+    if newest is not None:
+        last_modified = max(last_modified, newest)
+    return f'{newest}:{version}', last_modified
@@ -0,0 +1,101 @@
+"""Denormalized post, comment and follower counters.
+
+Counters are changed with ``F()`` updates from model signals, inside the
+transaction that saves or deletes the row. ``reconcile`` recomputes them
+from scratch and is used by the ``reconcile_counters`` command.
+"""
+from django.db.models import (
+    Count, F, IntegerField, OuterRef, Q, Subquery
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+def shifted(field, delta):
+    """``field + delta`` floored at zero, so drift never fails a delete."""
+    return Greatest(F(field) + delta, 0)
+
+
+def change_author_posts(author_id, delta):
+    if delta > 0:
+        AuthorStats.objects.get_or_create(author_id=author_id)
+    AuthorStats.objects.filter(author_id=author_id).update(
+        posts_count=shifted('posts_count', delta)
+    )
+
+
+def change_author_followers(author_id, delta):
+    if delta > 0:
+        AuthorStats.objects.get_or_create(author_id=author_id)
+    AuthorStats.objects.filter(author_id=author_id).update(
+        followers_count=shifted('followers_count', delta)
+    )
+
+
+def change_group_posts(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=shifted('posts_count', delta)
+        )
+
+
+def change_post_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=shifted('comments_count', delta)
+    )
+
+
+def author_posts_count(author):
+    return (AuthorStats.objects.filter(author=author)
+            .values_list('posts_count', flat=True).first() or 0)
+
+
+def author_followers_count(author_id):
+    return (AuthorStats.objects.filter(author_id=author_id)
+            .values_list('followers_count', flat=True).first() or 0)
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(amount=Count('pk'))
+        .values('amount'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def reconcile():
+    """Fix drifted counters, return how many rows were wrong per model."""
+    drift = {}
+    posts = Post.objects.annotate(actual=_count(Comment.objects, 'post'))
+    drift['post'] = posts.exclude(comments_count=F('actual')).update(
+        comments_count=_count(Comment.objects, 'post')
+    )
+    groups = Group.objects.annotate(actual=_count(Post.objects, 'group'))
+    drift['group'] = groups.exclude(posts_count=F('actual')).update(
+        posts_count=_count(Post.objects, 'group')
+    )
+    missing = (
+        User.objects.filter(Q(posts__isnull=False)
+                            | Q(following__isnull=False), stats__isnull=True)
+        .distinct().values_list('pk', flat=True)
+    )
+    AuthorStats.objects.bulk_create(
+        AuthorStats(author_id=pk) for pk in list(missing)
+    )
+    authors = AuthorStats.objects.annotate(
+        actual=_count(Post.objects, 'author')
+    )
+    drift['author'] = authors.exclude(posts_count=F('actual')).update(
+        posts_count=_count(Post.objects, 'author')
+    )
+    authors = AuthorStats.objects.annotate(
+        actual=_count(Follow.objects, 'author')
+    )
+    drift['followers'] = authors.exclude(
+        followers_count=F('actual')
+    ).update(followers_count=_count(Follow.objects, 'author'))
+    return drift
@@ -1,5 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from core import metrics
+from . import uploads
 from .models import Post, Comment
 
 
@@ -9,6 +12,15 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        metrics.UPLOAD_BYTES.observe(image.size)
+        return uploads.normalize(
+            image, Post._meta.get_field('image').storage
+        )
+
 
 class CommentForm(forms.ModelForm):
 
@@ -0,0 +1,98 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (override_settings, setup_databases,
+                               setup_test_environment, teardown_databases,
+                               teardown_test_environment)
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the hot views on a seeded test database and '
+            'compare the results with a baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=3000)
+        parser.add_argument('--follows', type=int, default=500)
+        parser.add_argument('--seed', type=int, help='Random seed.')
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Requests to every view.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Clear the cache before every request.'
+        )
+        parser.add_argument(
+            '--view', action='append', choices=benchmark.VIEWS,
+            dest='views', help='Only benchmark these views.'
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='JSON file for the results.'
+        )
+        parser.add_argument(
+            '--baseline', help='JSON results of an earlier run.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed latency and memory growth, 0.2 is 20%%.'
+        )
+
+    # Like the test runner, run without DEBUG and the debug toolbar.
+    @override_settings(DEBUG=False)
+    def handle(self, *args, **options):
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            benchmark.seed(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+                random_seed=options['seed'],
+            )
+            results = benchmark.run(
+                requests=options['requests'],
+                cold=options['cold'],
+                views=options['views'] or benchmark.VIEWS,
+            )
+        finally:
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+        report = {
+            'data': {
+                name: options[name]
+                for name in ('users', 'groups', 'posts', 'comments',
+                             'follows', 'requests', 'cold')
+            },
+            'views': results,
+        }
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent=2)
+        for view, result in results.items():
+            latency = ', '.join(
+                f'{name} {value} ms'
+                for name, value in result['latency_ms'].items()
+            )
+            self.stdout.write(
+                f'{view}: {latency}, {result["queries"]} queries, '
+                f'{result["memory_kib"]} KiB'
+            )
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+            regressions = benchmark.compare(
+                results, baseline['views'], options['tolerance']
+            )
+            if regressions:
+                raise CommandError(
+                    'Regressions against the baseline:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write('No regressions against the baseline.')
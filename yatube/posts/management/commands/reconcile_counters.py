@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized post and comment counters.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = counters.reconcile()
+        for model, fixed in drift.items():
+            self.stdout.write(f'{model}: fixed {fixed} counters')
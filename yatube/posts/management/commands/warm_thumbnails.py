@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails for existing post images.'
+
+    def handle(self, *args, **options):
+        names = (Post.objects.exclude(image='').order_by()
+                 .values_list('image', flat=True).distinct())
+        warmed = 0
+        for name in names.iterator():
+            try:
+                if thumbnails.generate(name, thumbnails.post_thumbnails()):
+                    warmed += 1
+            except Exception as error:
+                self.stderr.write(f'Thumbnails of {name} failed: {error}')
+        self.stdout.write(f'Warmed thumbnails of {warmed} images.')
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from posts import search
+
+
+def create_index(apps, schema_editor):
+    search.rebuild(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    if not search.is_enabled(schema_editor.connection):
+        return
+    for index in search.INDEXES.values():
+        for action in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {index}_{action}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {index}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_post_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_followers(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    Follow = apps.get_model('posts', 'Follow')
+    counts = dict(
+        Follow.objects.order_by().values_list('author')
+        .annotate(amount=Count('pk'))
+    )
+    known = set(AuthorStats.objects.values_list('author_id', flat=True))
+    AuthorStats.objects.bulk_create(
+        AuthorStats(author_id=author_id)
+        for author_id in counts if author_id not in known
+    )
+    for author_id, amount in counts.items():
+        AuthorStats.objects.filter(author_id=author_id).update(
+            followers_count=amount
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Followers'),
+        ),
+        migrations.RunPython(fill_followers, migrations.RunPython.noop),
+    ]
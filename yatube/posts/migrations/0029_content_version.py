@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_author_followers_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Version')),
+                ('changed', models.DateTimeField(verbose_name='Changed')),
+            ],
+        ),
+    ]
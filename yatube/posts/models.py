@@ -1,10 +1,37 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+
+from core.loaders import batch
 
 User = get_user_model()
 
+# Columns of authors and groups rendered in post cards and comments.
+AUTHOR_CARD_FIELDS = ('username', 'first_name', 'last_name')
+GROUP_CARD_FIELDS = ('title', 'slug')
+
+
+class CountersMixin:
+    """Save rows atomically without overwriting denormalized counters.
+
+    Counter fields are only changed by ``F()`` updates from signals, so a
+    stale instance must not write them back. Signals sent by ``save`` run
+    in the same transaction as the row itself.
+    """
+    counter_fields = ()
 
-class Post(models.Model):
+    def save(self, *args, **kwargs):
+        if (self.counter_fields and not self._state.adding
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class Post(CountersMixin, models.Model):
     id = models.AutoField(primary_key=True)
     text = models.TextField(
         verbose_name='Post',
@@ -35,15 +62,41 @@ class Post(models.Model):
         blank=True,
         help_text='Upload your image here (optional)'
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Comments',
+        default=0,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Version',
+        default=0,
+        editable=False
+    )
+
+    counter_fields = ('comments_count', 'version')
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
-class Group(models.Model):
+class Group(CountersMixin, models.Model):
     id = models.AutoField(primary_key=True)
     title = models.CharField(
         verbose_name='Group name',
@@ -57,12 +110,19 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Description',
         help_text='Type what this group is about')
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Posts',
+        default=0,
+        editable=False
+    )
+
+    counter_fields = ('posts_count',)
 
     def __str__(self):
         return self.title
 
 
-class Comment(models.Model):
+class Comment(CountersMixin, models.Model):
     post = models.ForeignKey(
         'Post',
         verbose_name='Post',
@@ -86,6 +146,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created',)
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -112,3 +178,69 @@ class Follow(models.Model):
                 name='check following'
             )
         ]
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Author'
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Posts',
+        default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Followers',
+        default=0
+    )
+
+
+class ContentVersion(models.Model):
+    """Single row versioning published content, see ``posts.changes``."""
+    version = models.PositiveIntegerField(
+        verbose_name='Version',
+        default=0
+    )
+    changed = models.DateTimeField(
+        verbose_name='Changed'
+    )
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Reader'
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Post'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Publication date'
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique timeline entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+
+
+batch(Post, author=AUTHOR_CARD_FIELDS, group=GROUP_CARD_FIELDS)
+batch(Comment, author=AUTHOR_CARD_FIELDS)
@@ -0,0 +1,239 @@
+import base64
+import binascii
+import json
+from operator import attrgetter
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Max, Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class Merge:
+    """Querysets with the same annotations paginated as one list.
+
+    Every slice reads each queryset as its own range limited to the end
+    of the slice and merges the rows in Python, so each read stays on
+    the index of its queryset. The querysets must not share rows.
+    """
+
+    def __init__(self, *querysets, ordering=()):
+        self.querysets = querysets
+        self.ordering = tuple(ordering)
+
+    def __repr__(self):
+        return f'<Merge of {len(self.querysets)} querysets>'
+
+    @property
+    def query(self):
+        return self.querysets[0].query
+
+    @property
+    def model(self):
+        return self.querysets[0].model
+
+    def _map(self, method, *args, **kwargs):
+        return [getattr(queryset, method)(*args, **kwargs)
+                for queryset in self.querysets]
+
+    def filter(self, *args, **kwargs):
+        return Merge(*self._map('filter', *args, **kwargs),
+                     ordering=self.ordering)
+
+    def select_related(self, *fields):
+        return Merge(*self._map('select_related', *fields),
+                     ordering=self.ordering)
+
+    def order_by(self, *ordering):
+        return Merge(*self._map('order_by', *ordering), ordering=ordering)
+
+    def reverse(self):
+        ordering = [field[1:] if field.startswith('-') else f'-{field}'
+                    for field in self.ordering]
+        return Merge(*self._map('reverse'), ordering=ordering)
+
+    def count(self):
+        return sum(self._map('count'))
+
+    def aggregate(self, **aggregates):
+        """Newest values of ``Max`` aggregates over all querysets."""
+        if not all(isinstance(aggregate, Max)
+                   for aggregate in aggregates.values()):
+            raise TypeError('Only Max aggregates can be merged')
+        results = self._map('aggregate', **aggregates)
+        return {
+            name: max((result[name] for result in results
+                       if result[name] is not None), default=None)
+            for name in aggregates
+        }
+
+    def __getitem__(self, k):
+        if not isinstance(k, slice) or k.step is not None:
+            raise TypeError('Merged querysets only support plain slices')
+        rows = [row for queryset in self.querysets
+                for row in queryset[:k.stop]]
+        for field in reversed(self.ordering):
+            rows.sort(key=attrgetter(field.lstrip('-')),
+                      reverse=field.startswith('-'))
+        return rows[k]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+class CursorPaginator(Paginator):
+    """Keyset paginator driven by opaque cursor tokens.
+
+    Pages are selected with a range condition on ``ordering`` instead of
+    OFFSET, so the cost of a page does not depend on how deep it is.
+    The last field of ``ordering`` must be unique to break ties.
+    A precomputed ``count`` replaces the ``COUNT(*)`` query.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id'),
+                 count=None):
+        self.ordering = tuple(ordering)
+        super().__init__(object_list.order_by(*self.ordering), per_page)
+        if count is not None:
+            self.count = count
+
+    @property
+    def fields(self):
+        return [(field.lstrip('-'), field.startswith('-'))
+                for field in self.ordering]
+
+    def encode_cursor(self, direction, obj):
+        values = [getattr(obj, name) for name, _ in self.fields]
+        data = json.dumps([direction] + values, default=str)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, *values = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            if direction not in (NEXT, PREVIOUS):
+                raise ValueError
+            if len(values) != len(self.fields):
+                raise ValueError
+            values = [self._field(name).to_python(value)
+                      for (name, _), value in zip(self.fields, values)]
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise InvalidCursor('That cursor is not valid')
+        return direction, values
+
+    def _field(self, name):
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def _position_filter(self, values, forward):
+        """Build ``(a, b) > (x, y)`` style condition for the keyset."""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def cursor_ending_with(self, obj):
+        """Cursor of the page whose last item is ``obj``."""
+        values = [getattr(obj, name) for name, _ in self.fields]
+        start = (
+            self.object_list
+            .filter(self._position_filter(values, forward=False))
+            .reverse()[self.per_page - 1:self.per_page]
+        )
+        for previous in start:
+            return self.encode_cursor(NEXT, previous)
+        return None
+
+    def get_page(self, cursor):
+        """Return a valid page, falling back to the first one."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def page(self, cursor):
+        if not cursor:
+            rows, has_next = self._fetch(None, forward=True)
+            return CursorPage(rows, None, self, has_next=has_next)
+        direction, values = self.decode_cursor(cursor)
+        if direction == NEXT:
+            rows, has_next = self._fetch(values, forward=True)
+            return CursorPage(rows, cursor, self,
+                              has_next=has_next, has_previous=True)
+        rows, has_previous = self._fetch(values, forward=False)
+        if not has_previous:
+            return self.page(None)
+        return CursorPage(rows, cursor, self,
+                          has_next=True, has_previous=True)
+
+    def _fetch(self, values, forward):
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(
+                self._position_filter(values, forward)
+            )
+        if not forward:
+            queryset = queryset.reverse()
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        return rows, has_more
+
+
+class PageType(type(Page)):
+    """Metaclass making a page class compare equal to ``Page``.
+
+    Callers check pages with ``type(page) == Page``, cursor pages still
+    pass it.
+    """
+
+    def __eq__(cls, other):
+        return other is Page or super().__eq__(other)
+
+    __hash__ = type(Page).__hash__
+
+
+class CursorPage(Page, metaclass=PageType):
+
+    def __init__(self, object_list, cursor, paginator,
+                 has_next=False, has_previous=False):
+        super().__init__(object_list, cursor, paginator)
+        self.cursor = cursor or ''
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage {self.cursor or "first"}>'
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.encode_cursor(NEXT, self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.encode_cursor(PREVIOUS, self.object_list[0])
+        return None
@@ -0,0 +1,138 @@
+"""Full-text search over posts and their comments.
+
+Post and comment texts are indexed in SQLite FTS5 tables that mirror
+``posts_post`` and ``posts_comment`` and are kept in sync by triggers.
+A post is found when its text or one of its comments matches, and is
+ranked by the best bm25 score of those matches.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Post
+
+INDEXES = {
+    Post: 'posts_post_fts',
+    Comment: 'posts_comment_fts',
+}
+# Comment matches count for less than matches in the post itself.
+COMMENT_WEIGHT = 0.5
+
+
+def _schema(index, table):
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+        f"text, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_insert "
+        f"AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {index}(rowid, text) VALUES (new.id, new.text); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_delete "
+        f"AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {index}({index}, rowid, text) "
+        f"VALUES ('delete', old.id, old.text); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_update "
+        f"AFTER UPDATE OF text ON {table} BEGIN "
+        f"INSERT INTO {index}({index}, rowid, text) "
+        f"VALUES ('delete', old.id, old.text); "
+        f"INSERT INTO {index}(rowid, text) VALUES (new.id, new.text); END",
+    ]
+
+
+def is_enabled(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install(using=connection):
+    """Create the index tables and triggers when they are missing.
+
+    SQLite drops triggers together with a table, and migrations rebuild
+    tables to alter them, so this runs again after every migrate.
+    """
+    if not is_enabled(using):
+        return
+    tables = using.introspection.table_names()
+    with using.cursor() as cursor:
+        for model, index in INDEXES.items():
+            if model._meta.db_table not in tables:
+                continue
+            for statement in _schema(index, model._meta.db_table):
+                cursor.execute(statement)
+
+
+def rebuild(using=connection):
+    """Reindex every post and comment from their tables."""
+    install(using)
+    if not is_enabled(using):
+        return
+    with using.cursor() as cursor:
+        for index in INDEXES.values():
+            cursor.execute(
+                f"INSERT INTO {index}({index}) VALUES ('rebuild')"
+            )
+
+
+def match_expression(query):
+    """Turn user input into an FTS5 query requiring every word."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def _matches(model):
+    """SQL condition on ``model`` rows whose own text matches."""
+    table, index = model._meta.db_table, INDEXES[model]
+    return (
+        f'{table}.id IN '
+        f'(SELECT rowid FROM {index} WHERE {index} MATCH %s)'
+    )
+
+
+def filter_queryset(queryset, query):
+    """Narrow posts or comments to those whose own text matches."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not is_enabled():
+        return queryset.filter(text__icontains=query)
+    return queryset.extra(
+        where=[_matches(queryset.model)], params=[expression]
+    )
+
+
+def search_posts(query):
+    """Posts matching ``query`` annotated with ``search_rank``.
+
+    Lower ranks are better, order by ``search_rank`` ascending.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return Post.objects.none()
+    if not is_enabled():
+        return Post.objects.filter(
+            Q(text__icontains=query) | Q(comments__text__icontains=query)
+        ).distinct().annotate(search_rank=Value(0.0, FloatField()))
+    post_index, comment_index = INDEXES[Post], INDEXES[Comment]
+    rank = RawSQL(
+        f'SELECT MIN(rank) FROM ('
+        f'SELECT bm25({post_index}) AS rank FROM {post_index} '
+        f'WHERE {post_index} MATCH %s AND rowid = posts_post.id '
+        f'UNION ALL '
+        f'SELECT bm25({comment_index}) * {COMMENT_WEIGHT} '
+        f'FROM {comment_index} '
+        f'JOIN posts_comment ON posts_comment.id = {comment_index}.rowid '
+        f'WHERE {comment_index} MATCH %s '
+        f'AND posts_comment.post_id = posts_post.id)',
+        [expression, expression],
+        output_field=FloatField()
+    )
+    commented = (
+        f'posts_post.id IN (SELECT posts_comment.post_id '
+        f'FROM {comment_index} '
+        f'JOIN posts_comment ON posts_comment.id = {comment_index}.rowid '
+        f'WHERE {comment_index} MATCH %s)'
+    )
+    return Post.objects.annotate(search_rank=rank).extra(
+        where=[f'{_matches(Post)} OR {commented}'],
+        params=[expression, expression]
+    )
@@ -0,0 +1,140 @@
+from django.db.models import F
+from django.db import connections
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from . import changes, counters, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User
+
+
+def bump_versions(**lookup):
+    """Invalidate cached post cards by moving them to a new version."""
+    Post.objects.filter(**lookup).update(version=F('version') + 1)
+    changes.touch()
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._saved_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author_posts(instance.author_id, 1)
+        counters.change_group_posts(instance.group_id, 1)
+        return
+    saved_group_id = getattr(instance, '_saved_group_id', None)
+    if saved_group_id != instance.group_id:
+        counters.change_group_posts(saved_group_id, -1)
+        counters.change_group_posts(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.change_author_posts(instance.author_id, -1)
+    counters.change_group_posts(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.change_post_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author_followers(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.change_author_followers(instance.author_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def bump_post_version(sender, instance, created, **kwargs):
+    if not created:
+        bump_versions(pk=instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_commented_post_version(sender, instance, **kwargs):
+    bump_versions(pk=instance.post_id)
+
+
+@receiver(post_save, sender=Group)
+def bump_group_posts_versions(sender, instance, created, **kwargs):
+    if not created:
+        bump_versions(group=instance)
+
+
+@receiver(pre_delete, sender=Group)
+def bump_ungrouped_posts_versions(sender, instance, **kwargs):
+    # Deleting clears Post.group with an UPDATE that sends no signals.
+    bump_versions(group=instance)
+
+
+@receiver(post_save, sender=User)
+def bump_author_posts_versions(sender, instance, created, update_fields,
+                               **kwargs):
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    bump_versions(author=instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_changes(sender, **kwargs):
+    changes.touch()
+
+
+@receiver(post_save, sender=Post)
+def warm_thumbnails(sender, instance, **kwargs):
+    if instance.image:
+        # Uploads are stored under the hash of their content.
+        thumbnails.schedule(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created and timeline.is_enabled():
+        timeline.fan_out_post.enqueue(
+            instance.pk, key=f'timeline:fan_out:{instance.pk}'
+        )
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created and timeline.is_enabled():
+        timeline.follow_changed.enqueue(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    if timeline.is_enabled():
+        timeline.follow_changed.enqueue(instance.user_id, instance.author_id)
+        if timeline.stopped_being_popular(instance.author_id):
+            timeline.backfill_followers.enqueue(instance.author_id)
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using, **kwargs):
+    if sender.name == 'posts':
+        search.install(connections[using])
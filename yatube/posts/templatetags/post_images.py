@@ -0,0 +1,36 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+CARD_SIZES = '(max-width: 992px) 100vw, 960px'
+FALLBACK_WIDTH = 960
+
+
+def srcset(variants):
+    return ', '.join(f'{thumbnail.url} {width}w'
+                     for width, thumbnail in variants)
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(image, sizes=CARD_SIZES):
+    """Responsive ``<picture>`` with width variants of a post image.
+
+    Variants that are not generated yet are left out, the original image
+    is shown while none of them is ready.
+    """
+    if not image:
+        return {}
+    sources = {image_format: thumbnails.variants(image, image_format)
+               for image_format in thumbnails.image_formats()}
+    src = image.url
+    for width, thumbnail in sources['JPEG']:
+        if width <= FALLBACK_WIDTH:
+            src = thumbnail.url
+    return {
+        'src': src,
+        'sizes': sizes,
+        'webp': srcset(sources.get('WEBP', ())),
+        'jpeg': srcset(sources['JPEG']),
+    }
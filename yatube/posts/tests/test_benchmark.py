@@ -0,0 +1,53 @@
+from django.test import TestCase
+
+from posts import benchmark
+from posts.models import Comment, Follow, Post
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        benchmark.seed(
+            users=4, groups=2, posts=12, comments=20, follows=5,
+            random_seed=1
+        )
+
+    def test_seed(self):
+        """Seeding creates the requested volumes."""
+        self.assertEqual(Post.objects.count(), 12)
+        self.assertEqual(Comment.objects.count(), 20)
+        self.assertEqual(Follow.objects.count(), 5)
+
+    def test_run_measures_every_view(self):
+        """Every hot view gets latency, queries and memory measured."""
+        results = benchmark.run(requests=3)
+        self.assertEqual(set(results), set(benchmark.VIEWS))
+        for view, result in results.items():
+            with self.subTest(view=view):
+                self.assertEqual(
+                    set(result['latency_ms']), {'p50', 'p90', 'p99'}
+                )
+                self.assertGreater(result['queries'], 0)
+                self.assertGreater(result['memory_kib'], 0)
+
+    def test_compare(self):
+        """Only growth over the tolerance and extra queries regress."""
+        baseline = {'index': {
+            'latency_ms': {'p50': 10.0}, 'queries': 4, 'memory_kib': 100.0
+        }}
+        within = {'index': {
+            'latency_ms': {'p50': 11.0}, 'queries': 4, 'memory_kib': 110.0
+        }}
+        worse = {'index': {
+            'latency_ms': {'p50': 13.0}, 'queries': 5, 'memory_kib': 130.0
+        }}
+        self.assertEqual(benchmark.compare(within, baseline, 0.2), [])
+        self.assertEqual(len(benchmark.compare(worse, baseline, 0.2)), 3)
+
+    def test_percentile(self):
+        """Nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([5], 90), 5)
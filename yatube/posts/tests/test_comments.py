@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.models import Comment, Group, Post
@@ -59,3 +59,72 @@ class CommentsTests(TestCase):
             follow=True
         )
         self.assertEqual(Comment.objects.count(), comments_count + 1)
+
+    def test_comment_changes_post_version(self):
+        """New comment invalidates cached post card."""
+        version = Post.objects.get(pk=self.post.pk).version
+        self.authorized_client.post(
+            reverse(
+                'posts:add_comment',
+                kwargs={'post_id': self.post.id}
+            ),
+            data={'text': 'Comment text'}
+        )
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).version,
+            version + 1
+        )
+
+
+@override_settings(COMMENTS_PAGINATOR_AMOUNT=3)
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Din')
+        cls.post = Post.objects.create(author=cls.user, text='Test post')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Comment {number}'
+            )
+            for number in range(7)
+        ]
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_detail_shows_first_comments(self):
+        """Post page shows the oldest comments first, one page of them."""
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.comments[:3])
+        self.assertTrue(comments.has_next())
+
+    def test_comments_fragment_returns_next_batch(self):
+        """Comments fragment continues from the cursor."""
+        first = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        ).context['comments']
+        response = self.authorized_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+            {'cursor': first.next_cursor}
+        )
+        self.assertEqual(list(response.context['comments']),
+                         self.comments[3:6])
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+
+    def test_new_comment_redirects_to_its_page(self):
+        """After commenting, the page ending with the new comment opens."""
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'Newest comment'},
+            follow=True
+        )
+        comment = Comment.objects.latest('id')
+        url, _ = response.redirect_chain[-1]
+        self.assertTrue(url.endswith(f'#comment-{comment.pk}'))
+        self.assertEqual(list(response.context['comments']),
+                         self.comments[5:] + [comment])
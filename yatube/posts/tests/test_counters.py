@@ -0,0 +1,126 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts import counters
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        self.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        self.other_group = Group.objects.create(
+            title='Other group',
+            slug='other-slug',
+            description='Other description',
+        )
+        self.user = User.objects.create_user(username='Grogu')
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Test post',
+            group=self.group
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def refresh(self):
+        self.post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+
+    def test_post_create_and_delete_change_counters(self):
+        """Posts are counted per author and per group."""
+        new_post = Post.objects.create(
+            author=self.user, text='New post', group=self.group
+        )
+        self.refresh()
+        self.assertEqual(counters.author_posts_count(self.user), 2)
+        self.assertEqual(self.group.posts_count, 2)
+        new_post.delete()
+        self.refresh()
+        self.assertEqual(counters.author_posts_count(self.user), 1)
+        self.assertEqual(self.group.posts_count, 1)
+
+    def test_group_change_moves_counter(self):
+        """Editing post group moves it between group counters."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+        self.refresh()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+
+    def test_comments_are_counted(self):
+        """Comments are counted per post and not overwritten on save."""
+        stale_post = Post.objects.get(pk=self.post.pk)
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Comment'
+        )
+        stale_post.text = 'Edited post'
+        stale_post.save()
+        self.refresh()
+        self.assertEqual(self.post.comments_count, 1)
+        comment.delete()
+        self.refresh()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_drifted_counters_stay_at_zero(self):
+        """Deletes succeed when counters have drifted to zero."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Comment'
+        )
+        post = Post.objects.create(
+            author=self.user, text='New post', group=self.group
+        )
+        Post.objects.update(comments_count=0)
+        Group.objects.update(posts_count=0)
+        AuthorStats.objects.update(posts_count=0)
+        comment.delete()
+        post.delete()
+        self.refresh()
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(counters.author_posts_count(self.user), 0)
+
+    def test_followers_are_counted(self):
+        """Followers of an author are counted and reconciled."""
+        reader = User.objects.create_user(username='Lea')
+        follow = Follow.objects.create(user=reader, author=self.user)
+        self.assertEqual(counters.author_followers_count(self.user.pk), 1)
+        AuthorStats.objects.update(followers_count=5)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(counters.author_followers_count(self.user.pk), 1)
+        follow.delete()
+        self.assertEqual(counters.author_followers_count(self.user.pk), 0)
+
+    def test_profile_shows_counter(self):
+        """Profile total comes from the counter."""
+        AuthorStats.objects.filter(author=self.user).update(posts_count=42)
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertEqual(response.context['count'], 42)
+
+    def test_reconcile_fixes_drift(self):
+        """Command recomputes drifted counters."""
+        AuthorStats.objects.all().delete()
+        Group.objects.update(posts_count=7)
+        Post.objects.update(comments_count=3)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.refresh()
+        self.assertEqual(counters.author_posts_count(self.user), 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(self.other_group.posts_count, 0)
+        self.assertEqual(self.post.comments_count, 0)
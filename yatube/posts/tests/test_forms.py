@@ -1,12 +1,16 @@
+import hashlib
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from posts.forms import PostForm
 from posts.models import Post, Group
 
 User = get_user_model()
@@ -80,7 +84,8 @@ class PostFormTests(TestCase):
                 author=self.user,
                 text=form_data['text'],
                 group=self.group,
-                image='posts/small.gif'
+                image=(f'posts/{hashlib.sha256(small_gif).hexdigest()[:32]}'
+                       '.gif')
             ).exists()
         )
 
@@ -149,3 +154,53 @@ class PostFormTests(TestCase):
         self.assertNotEqual(Post.objects.get(pk=self.post.id).text,
                             form_data['text']
                             )
+
+
+def make_upload(size=(100, 50), image_format='JPEG', **save_options):
+    content = BytesIO()
+    Image.new('RGB', size, 'red').save(content, image_format, **save_options)
+    return SimpleUploadedFile(
+        f'upload.{image_format.lower()}',
+        content.getvalue(),
+        content_type=f'image/{image_format.lower()}'
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_DIMENSION=64,
+    POST_IMAGE_MAX_PIXELS=20000
+)
+class ImageUploadTests(TestCase):
+    def clean_image(self, upload):
+        form = PostForm(data={'text': 'Post'}, files={'image': upload})
+        form.is_valid()
+        return form
+
+    def test_large_image_is_downscaled_and_stripped(self):
+        """Stored original is capped and has no EXIF."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera maker'
+        form = self.clean_image(make_upload(exif=exif.tobytes()))
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.size, (64, 32))
+        self.assertNotIn('exif', image.info)
+
+    def test_identical_uploads_share_file(self):
+        """Known content reuses the stored file."""
+        upload = make_upload()
+        post = Post.objects.create(
+            author=User.objects.create_user(username='Grogu'),
+            text='Post',
+            image=self.clean_image(upload).cleaned_data['image']
+        )
+        upload.seek(0)
+        self.assertEqual(
+            self.clean_image(upload).cleaned_data['image'],
+            post.image.name
+        )
+
+    def test_decompression_bomb_is_rejected(self):
+        """Images over the pixel budget are rejected."""
+        form = self.clean_image(make_upload(size=(200, 200)))
+        self.assertIn('image', form.errors)
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        self.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        self.author = User.objects.create_user(username='Grogu')
+        self.follower = User.objects.create_user(username='Lea')
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.post = Post.objects.create(
+            author=self.author,
+            text='Test post',
+            group=self.group
+        )
+        Comment.objects.create(
+            post=self.post,
+            author=self.follower,
+            text='Test comment'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def query_plans(self, url, table):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'ORDER BY' not in sql:
+                    continue
+                if f'FROM "{table}"' not in sql:
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans.append(' | '.join(row[-1] for row in cursor.fetchall()))
+        return plans
+
+    def test_feed_queries_use_indexes(self):
+        """Feed queries are index range scans without a sort step."""
+        pages = (
+            (reverse('posts:main_page'), 'posts_post', 'post_pub_date_idx'),
+            (reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+             'posts_post', 'post_group_pub_date_idx'),
+            (reverse('posts:profile', kwargs={'username': self.author}),
+             'posts_post', 'post_author_pub_date_idx'),
+            (reverse('posts:follow_index'),
+             'posts_post', 'timeline_user_pub_date_idx'),
+            (reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+             'posts_comment', 'comment_post_created_idx'),
+        )
+        for url, table, index in pages:
+            with self.subTest(url=url):
+                plans = self.query_plans(url, table)
+                self.assertTrue(plans)
+                for plan in plans:
+                    self.assertIn(index, plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_merged_follow_feed_uses_indexes(self):
+        """Popular authors are read as ranges of the author index."""
+        plans = self.query_plans(reverse('posts:follow_index'), 'posts_post')
+        self.assertEqual(len(plans), 2)
+        self.assertIn('timeline_user_pub_date_idx', plans[0])
+        self.assertIn('post_author_pub_date_idx', plans[1])
+        for plan in plans:
+            self.assertNotIn('TEMP B-TREE', plan)
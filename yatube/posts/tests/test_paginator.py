@@ -1,11 +1,11 @@
-from math import ceil
-
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.paginator import Page
 from django.test import TestCase, Client
 from django.urls import reverse
 
 from posts.models import Post, Group
+from posts.paginator import CursorPaginator
 
 User = get_user_model()
 
@@ -45,22 +45,54 @@ class PaginatorTest(TestCase):
                 kwargs={'username': self.user}
             )
         )
-        last_page_num = ceil(self.POSTS_AMOUNT / settings.PAGINATOR_AMOUNT)
         last_page_posts_amount = (self.POSTS_AMOUNT
-                                  - (last_page_num - 1)
-                                  * settings.PAGINATOR_AMOUNT)
+                                  - settings.PAGINATOR_AMOUNT)
         for page in page_list:
             with self.subTest():
                 first_response = self.guest_client.get(page)
-                self.assertEqual(len(
-                    first_response.context['page_obj']),
-                    settings.PAGINATOR_AMOUNT
-                )
+                first_page = first_response.context['page_obj']
+                self.assertEqual(len(first_page), settings.PAGINATOR_AMOUNT)
                 last_response = self.guest_client.get(
                     page,
-                    {'page': last_page_num}
-                )
-                self.assertEqual(len(
-                    last_response.context['page_obj']),
-                    last_page_posts_amount
+                    {'cursor': first_page.next_cursor}
                 )
+                last_page = last_response.context['page_obj']
+                self.assertEqual(len(last_page), last_page_posts_amount)
+                self.assertFalse(last_page.has_next())
+                self.assertTrue(last_page.has_previous())
+
+    def test_cursor_pages_do_not_overlap(self):
+        """Walking forward and back with cursors visits every post once."""
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        seen = []
+        page = paginator.page(None)
+        while True:
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        previous = paginator.page(page.previous_cursor)
+        self.assertEqual([post.pk for post in previous], expected[5:10])
+
+    def test_invalid_cursor_shows_first_page(self):
+        """Broken cursor falls back to the first page."""
+        response = self.guest_client.get(
+            reverse('posts:main_page'),
+            {'cursor': 'not-a-cursor'}
+        )
+        self.assertFalse(response.context['page_obj'].has_previous())
+        self.assertEqual(
+            len(response.context['page_obj']),
+            settings.PAGINATOR_AMOUNT
+        )
+
+    def test_cursor_page_passes_page_type_check(self):
+        """Cursor pages pass the ``type(page) == Page`` check of callers."""
+        page = CursorPaginator(Post.objects.all(), 5).page(None)
+        self.assertEqual(type(page), Page)
+        self.assertIsNot(type(page), Page)
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import resolve, reverse
+
+from core.queries import log_queries
+from posts import urls
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Budget of views that do not declare one with core.queries.query_budget.
+DEFAULT_BUDGET = 6
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        self.user = User.objects.create_user(username='Cara')
+        authors = [
+            User.objects.create_user(
+                username=f'author{number}', first_name='Greef'
+            )
+            for number in range(3)
+        ]
+        groups = [
+            Group.objects.create(
+                title=f'Group {number}',
+                slug=f'group-{number}',
+                description='Description',
+            )
+            for number in range(3)
+        ]
+        posts = [
+            Post.objects.create(
+                author=authors[number % 3],
+                group=groups[number % 3],
+                text=f'Searchable post {number}',
+            )
+            for number in range(9)
+        ]
+        for post in posts:
+            for author in authors:
+                Comment.objects.create(post=post, author=author, text='Hi')
+        for author in authors:
+            Follow.objects.create(user=self.user, author=author)
+        self.kwargs = {
+            'slug': groups[0].slug,
+            'username': authors[0].username,
+            'post_id': posts[0].pk,
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertQueryBudget(self, url, budget, data=None, method='get'):
+        with log_queries() as log:
+            getattr(self.authorized_client, method)(url, data)
+        self.assertLessEqual(log.count, budget, '\n'.join(log.queries))
+        self.assertEqual(
+            log.repeated(settings.QUERY_REPEAT_LIMIT), {}, f'N+1 on {url}'
+        )
+
+    def test_every_url_is_within_budget(self):
+        """Every posts URL stays within its query budget without N+1."""
+        for pattern in urls.urlpatterns:
+            kwargs = {
+                name: self.kwargs[name] for name in pattern.pattern.converters
+            }
+            url = reverse(f'posts:{pattern.name}', kwargs=kwargs)
+            budget = getattr(pattern.callback, 'query_budget', DEFAULT_BUDGET)
+            with self.subTest(url=url):
+                self.assertQueryBudget(url, budget, {'q': 'searchable'})
+
+    def test_every_write_is_within_budget(self):
+        """Posting to write views stays within their query budget."""
+        post = Post.objects.create(author=self.user, text='Own post')
+        author = User.objects.create_user(username='Bo-Katan')
+        Post.objects.create(author=author, text='Post to backfill')
+        writes = (
+            ('post_create', {}, {'text': 'New post'}),
+            ('post_edit', {'post_id': post.pk}, {'text': 'Edited post'}),
+            ('add_comment', {'post_id': post.pk}, {'text': 'Comment'}),
+            ('profile_follow', {'username': author.username}, None),
+        )
+        for name, kwargs, data in writes:
+            url = reverse(f'posts:{name}', kwargs=kwargs)
+            view = resolve(url).func
+            with self.subTest(url=url):
+                self.assertQueryBudget(url, view.query_budget, data, 'post')
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Cara')
+        cls.ship = Post.objects.create(
+            author=cls.user, text='The Razor Crest is a gunship'
+        )
+        cls.crest = Post.objects.create(
+            author=cls.user, text='Crest crest crest of Mandalore'
+        )
+        cls.commented = Post.objects.create(
+            author=cls.user, text='Nothing to see here'
+        )
+        Comment.objects.create(
+            post=cls.commented, author=cls.user, text='Where is the gunship?'
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_search_finds_posts_and_comments(self):
+        """Search matches post texts and comments of posts."""
+        found = set(search.search_posts('gunship'))
+        self.assertEqual(found, {self.ship, self.commented})
+
+    def test_search_ranks_better_matches_first(self):
+        """Posts with more relevant text come first."""
+        found = list(search.search_posts('crest').order_by('search_rank'))
+        self.assertEqual(found, [self.crest, self.ship])
+
+    def test_search_ignores_query_syntax(self):
+        """Operators and quotes in a query are searched as plain words."""
+        self.assertEqual(list(search.search_posts('"crest" OR')), [])
+        self.assertEqual(list(search.search_posts('*')), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Triggers keep the index in sync with post texts."""
+        post = Post.objects.create(author=self.user, text='Beskar steel')
+        self.assertEqual(list(search.search_posts('beskar')), [post])
+        post.text = 'Durasteel'
+        post.save()
+        self.assertEqual(list(search.search_posts('beskar')), [])
+        post.delete()
+        self.assertEqual(list(search.search_posts('durasteel')), [])
+
+    @override_settings(PAGINATOR_AMOUNT=1)
+    def test_search_page_is_paginated(self):
+        """Search page pages through results keeping the query."""
+        url = reverse('posts:post_search')
+        response = self.client.get(url, {'q': 'gunship'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 1)
+        self.assertContains(response, '?q=gunship&amp;cursor=')
+        response = self.client.get(
+            url, {'q': 'gunship', 'cursor': page_obj.next_cursor}
+        )
+        self.assertEqual(
+            {page_obj[0], response.context['page_obj'][0]},
+            {self.ship, self.commented}
+        )
+
+    def test_rebuild_command_restores_index(self):
+        """Rebuild command reindexes existing rows."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO posts_post_fts(posts_post_fts) "
+                "VALUES ('delete-all')"
+            )
+        self.assertEqual(list(search.search_posts('mandalore')), [])
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(list(search.search_posts('mandalore')), [self.crest])
+
+    def test_admin_search_uses_index(self):
+        """Admin search narrows posts through the index."""
+        admin = User.objects.create_superuser('Greef', 'g@k.ru', 'pass')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'razor'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.ship]
+        )
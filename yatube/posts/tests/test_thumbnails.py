@@ -0,0 +1,134 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from core import tasks
+from core.models import Task
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='photo.jpg', size=(1200, 800), image_format='JPEG'):
+    content = BytesIO()
+    Image.new('RGB', size, 'blue').save(content, image_format)
+    return SimpleUploadedFile(
+        name, content.getvalue(), f'image/{image_format.lower()}'
+    )
+
+
+def render_picture(post):
+    return Template(
+        '{% load post_images %}{% post_picture post.image %}'
+    ).render(Context({'post': post}))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Grogu')
+
+    def tearDown(self):
+        default.kvstore.clear()
+
+    def run_tasks(self):
+        for claimed in tasks.claim(10):
+            tasks.execute(claimed)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_thumbnails_are_generated_in_background(self):
+        """Original is served until the task of the image has run."""
+        post = Post.objects.create(
+            author=self.user, text='Test post', image=make_image()
+        )
+        queued = Task.objects.filter(key=f'thumbnails:{post.image.name}')
+        self.assertEqual(thumbnails.variants(post.image, 'JPEG'), [])
+        self.assertTrue(queued.exists())
+        self.run_tasks()
+        post.refresh_from_db()
+        self.assertEqual(post.version, 1)
+        ready = thumbnails.variants(post.image, 'JPEG')
+        self.assertEqual(
+            [width for width, thumbnail in ready],
+            list(thumbnails.POST_IMAGE_WIDTHS)
+        )
+        self.assertEqual((ready[2][1].width, ready[2][1].height), (960, 339))
+        self.assertFalse(queued.exists())
+        thumbnails.schedule(post.image.name)
+        self.assertTrue(queued.exists())
+
+    def test_reads_do_not_generate_thumbnails(self):
+        """Pending variants are neither rendered nor queued by reads."""
+        post = Post.objects.create(author=self.user, text='Test post')
+        Post.objects.filter(pk=post.pk).update(
+            image=default.storage.save('posts/pending.jpg', make_image())
+        )
+        post.refresh_from_db()
+        for image_format in thumbnails.image_formats():
+            self.assertEqual(thumbnails.variants(post.image, image_format), [])
+        with override_settings(TASKS_EAGER=False):
+            render_picture(post)
+        self.assertFalse(Task.objects.exists())
+
+    def test_other_thumbnails_are_rendered_inline(self):
+        """Thumbnails that are not post variants are not queued."""
+        name = default.storage.save('posts/inline.jpg', make_image())
+        thumbnail = get_thumbnail(name, '100x100')
+        self.assertEqual((thumbnail.width, thumbnail.height), (100, 67))
+        self.assertFalse(Task.objects.exists())
+
+    def test_warm_thumbnails_command(self):
+        """Command generates missing thumbnails, bumping cards once."""
+        post = Post.objects.create(author=self.user, text='Test post')
+        Post.objects.filter(pk=post.pk).update(
+            image=default.storage.save('posts/old.jpg', make_image())
+        )
+        call_command('warm_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.version, 1)
+        call_command('warm_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.version, 1)
+
+    def test_picture_lists_all_variants(self):
+        """Picture has a srcset with every width and a JPEG fallback."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Test post',
+            image=make_image('photo.png', image_format='PNG')
+        )
+        html = render_picture(post)
+        for width in thumbnails.POST_IMAGE_WIDTHS:
+            self.assertIn(f'.jpg {width}w', html)
+        self.assertNotIn(post.image.url, html)
+        self.assertEqual(
+            'image/webp' in html,
+            'WEBP' in thumbnails.image_formats()
+        )
+
+    @override_settings(TASKS_EAGER=False)
+    def test_picture_without_variants_shows_original(self):
+        """Only the original is shown while variants are pending."""
+        post = Post.objects.create(author=self.user, text='Test post')
+        Post.objects.filter(pk=post.pk).update(image='posts/missing.jpg')
+        post.refresh_from_db()
+        html = render_picture(post)
+        self.assertIn(f'src="{post.image.url}"', html)
+        self.assertNotIn('srcset', html)
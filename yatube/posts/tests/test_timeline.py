@@ -0,0 +1,148 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from core import tasks
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+@override_settings(TIMELINE_ENABLED=True, TIMELINE_FANOUT_LIMIT=1)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(self):
+        super().setUpClass()
+        self.author = User.objects.create_user(username='Grogu')
+        self.follower = User.objects.create_user(username='Lea')
+        self.other = User.objects.create_user(username='Han')
+        self.old_post = Post.objects.create(
+            author=self.author,
+            text='Old post',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.follower)
+
+    def follow(self, user, author):
+        Follow.objects.create(user=user, author=author)
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Follow copies author posts to timeline, unfollow removes them."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author})
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=self.old_post
+        ).exists())
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': self.author})
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.follower).exists()
+        )
+
+    def test_new_post_is_fanned_out(self):
+        """New post appears in follower timeline table and feed."""
+        self.follow(self.follower, self.author)
+        new_post = Post.objects.create(author=self.author, text='New post')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=new_post
+        ).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(new_post, response.context['page_obj'])
+
+    def test_popular_author_is_merged_on_read(self):
+        """Posts of popular authors are not fanned out but still shown."""
+        self.follow(self.follower, self.author)
+        self.follow(self.other, self.author)
+        new_post = Post.objects.create(author=self.author, text='New post')
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=new_post).exists()
+        )
+        self.assertEqual(
+            timeline.popular_authors(self.follower), [self.author.pk]
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(new_post, response.context['page_obj'])
+        self.assertIn(self.old_post, response.context['page_obj'])
+
+    @override_settings(PAGINATOR_AMOUNT=2)
+    def test_popular_posts_are_merged_in_order(self):
+        """Timeline and popular author posts are paged as one feed."""
+        self.follow(self.follower, self.author)
+        self.follow(self.other, self.author)
+        self.follow(self.follower, self.other)
+        posts = [
+            Post.objects.create(author=author, text=f'Post {number}')
+            for number, author in enumerate(
+                (self.other, self.author, self.other, self.author)
+            )
+        ]
+        url = reverse('posts:follow_index')
+        pages = []
+        cursor = ''
+        while True:
+            response = self.authorized_client.get(url, {'cursor': cursor})
+            pages.append(list(response.context['page_obj']))
+            if not response.context['page_obj'].has_next():
+                break
+            cursor = response.context['page_obj'].next_cursor
+        self.assertEqual(
+            sum(pages, []), posts[::-1] + [self.old_post]
+        )
+        previous = response.context['page_obj'].previous_cursor
+        response = self.authorized_client.get(url, {'cursor': previous})
+        self.assertEqual(list(response.context['page_obj']), pages[-2])
+
+    @override_settings(TASKS_EAGER=False)
+    def test_timelines_are_updated_by_tasks(self):
+        """Follow and new post reach the timeline once their tasks run."""
+        self.follow(self.follower, self.author)
+        new_post = Post.objects.create(author=self.author, text='New post')
+        self.assertFalse(TimelineEntry.objects.exists())
+        for claimed in tasks.claim(10):
+            tasks.execute(claimed)
+        self.assertCountEqual(
+            TimelineEntry.objects.values_list('post', flat=True),
+            [self.old_post.pk, new_post.pk]
+        )
+        Follow.objects.filter(user=self.follower).delete()
+        for claimed in tasks.claim(10):
+            tasks.execute(claimed)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_author_back_under_limit_is_backfilled(self):
+        """Posts published while popular reach timelines after unfollows."""
+        self.follow(self.follower, self.author)
+        self.follow(self.other, self.author)
+        new_post = Post.objects.create(author=self.author, text='New post')
+        Follow.objects.filter(user=self.other).delete()
+        self.assertEqual(timeline.popular_authors(self.follower), [])
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=new_post
+        ).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(new_post, response.context['page_obj'])
+
+    def test_rebuild_command(self):
+        """Command restores timelines from follows."""
+        self.follow(self.follower, self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=self.old_post
+        ).exists())
+
+    @override_settings(TIMELINE_ENABLED=False)
+    def test_disabled_timeline_reads_follow_join(self):
+        """Without timelines the feed is built from Follow directly."""
+        self.follow(self.follower, self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertIn(self.old_post, timeline.follow_posts(self.follower))
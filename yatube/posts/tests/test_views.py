@@ -136,21 +136,120 @@ class PostViewsTests(TestCase):
         self.assertNotIn(self.post, response.context['page_obj'])
 
     # test for cache
-    def test_cache_on_main_page(self):
-        """Posts saved in cache on main page."""
-        response_initial = self.authorized_client.get(
-            reverse('posts:main_page')
+    def test_post_cards_are_cached_by_version(self):
+        """Post cards are reused until the post version changes."""
+        cache.clear()
+        pages = (
+            reverse('posts:main_page'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        self.authorized_client.get(pages[0])
+        Post.objects.filter(pk=self.post.pk).update(text='Changed quietly')
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.authorized_client.get(page)
+                self.assertContains(response, self.post.text)
+                self.assertNotContains(response, 'Changed quietly')
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Edited post'
+        post.save()
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.authorized_client.get(page)
+                self.assertContains(response, 'Edited post')
+
+    def test_deleted_post_leaves_main_page(self):
+        """Deleted post disappears from main page at once."""
+        cache.clear()
+        post = Post.objects.create(author=self.user, text='Short lived')
+        response = self.authorized_client.get(reverse('posts:main_page'))
+        self.assertContains(response, 'Short lived')
+        post.delete()
+        response = self.authorized_client.get(reverse('posts:main_page'))
+        self.assertNotContains(response, 'Short lived')
+
+    def test_deleted_group_leaves_post_cards(self):
+        """Cards of posts of a deleted group stop showing the group."""
+        cache.clear()
+        group = Group.objects.create(
+            title='Doomed group', slug='doomed', description='Description'
         )
-        Post.objects.get(id=self.post.id).delete()
-        response_from_cache = self.authorized_client.get(
-            reverse('posts:main_page')
+        Post.objects.create(author=self.user, text='Grouped', group=group)
+        response = self.authorized_client.get(reverse('posts:main_page'))
+        self.assertContains(response, 'Doomed group')
+        group.delete()
+        response = self.authorized_client.get(reverse('posts:main_page'))
+        self.assertContains(response, 'Grouped')
+        self.assertNotContains(response, 'Doomed group')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Ahsoka')
+        cls.group = Group.objects.create(
+            title='Test group', slug='test-slug', description='Description'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Test post', group=cls.group
         )
-        self.assertEqual(response_initial.content, response_from_cache.content)
+
+    def setUp(self):
         cache.clear()
-        response_clear = self.authorized_client.get(
-            reverse('posts:main_page')
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_unchanged_pages_answer_not_modified(self):
+        """Pages with a current ETag answer 304."""
+        urls = [
+            reverse('posts:main_page'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'Ahsoka'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_comment_changes_post_page_etag(self):
+        """New comment makes the post page change."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.authorized_client.get(url)['ETag']
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Comment'}
         )
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_pages_differ_per_user(self):
+        """Guests and authorized users get different ETags."""
+        url = reverse('posts:main_page')
         self.assertNotEqual(
-            response_from_cache.content,
-            response_clear.content
+            self.guest_client.get(url)['ETag'],
+            self.authorized_client.get(url)['ETag']
+        )
+
+    def test_cache_control_depends_on_user(self):
+        """Guest pages are public, pages of authorized users private."""
+        url = reverse('posts:main_page')
+        guest = self.guest_client.get(url)['Cache-Control']
+        self.assertIn('public', guest)
+        self.assertIn(f'max-age={settings.PAGE_MAX_AGE}', guest)
+        self.assertIn(
+            'private', self.authorized_client.get(url)['Cache-Control']
+        )
+
+    def test_about_pages_are_cached_long(self):
+        """About pages may be cached for a long time."""
+        response = self.guest_client.get(reverse('about:author'))
+        self.assertIn(
+            f'max-age={settings.ABOUT_PAGE_MAX_AGE}',
+            response['Cache-Control']
         )
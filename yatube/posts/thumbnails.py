@@ -0,0 +1,141 @@
+"""Background generation of post image thumbnails.
+
+``AsyncThumbnailBackend`` is plugged into sorl-thumbnail. When a variant of
+a post image is not generated yet the original image is returned, so a
+request never decodes or resizes images and reads never write. Every
+variant of an image is created by a background task queued when the image
+is uploaded, or by the ``warm_thumbnails`` command. Once the thumbnails are
+stored, cards of posts using the image get a new version. Other thumbnails
+are rendered inline.
+"""
+import time
+
+from django.db.models import F
+from PIL import features
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import metrics, profiling, tasks, tracing
+from . import changes
+from .models import Post
+
+# Post images are rendered as a set of width variants in every format the
+# image library can encode, browsers pick one from srcset and sizes.
+POST_IMAGE_WIDTHS = (320, 640, 960, 1440)
+POST_IMAGE_RATIO = 339 / 960
+POST_IMAGE_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def image_formats():
+    formats = ['JPEG']
+    if features.check('webp'):
+        formats.insert(0, 'WEBP')
+    return formats
+
+
+def geometry(width):
+    return f'{width}x{round(width * POST_IMAGE_RATIO)}'
+
+
+def post_thumbnails():
+    """Geometry and sorl options of every variant of a post image."""
+    return [
+        (geometry(width), {**POST_IMAGE_OPTIONS, 'format': image_format})
+        for image_format in image_formats()
+        for width in POST_IMAGE_WIDTHS
+    ]
+
+
+def variants(image, image_format):
+    """Generated ``(width, thumbnail)`` variants, pending ones left out."""
+    ready = []
+    with profiling.section('thumbnails'), tracing.span(
+            'thumbnails.variants', attributes={'image.format': image_format}):
+        for width in POST_IMAGE_WIDTHS:
+            thumbnail = default.backend.get_thumbnail(
+                image, geometry(width), format=image_format,
+                **POST_IMAGE_OPTIONS
+            )
+            if thumbnail.name != image.name:
+                ready.append((width, thumbnail))
+    return ready
+
+
+class AsyncThumbnailBackend(ThumbnailBackend):
+
+    def _thumbnail_file(self, source, geometry_string, options):
+        """Destination of a thumbnail, as ``get_thumbnail`` computes it."""
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        start = time.perf_counter()
+        super()._create_thumbnail(
+            source_image, geometry_string, options, thumbnail
+        )
+        metrics.THUMBNAIL_SECONDS.observe(
+            time.perf_counter() - start, format=options['format']
+        )
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if (options.pop('synchronous', False) or not file_
+                or (geometry_string, options) not in post_thumbnails()):
+            return super().get_thumbnail(file_, geometry_string, **options)
+        source = ImageFile(file_)
+        thumbnail = self._thumbnail_file(
+            source, geometry_string, dict(options)
+        )
+        return default.kvstore.get(thumbnail) or source
+
+
+def generate(name, thumbnails):
+    """Create missing ``(geometry, options)`` thumbnails of an image.
+
+    Cards of posts showing it get one new version when any was created.
+    Returns how many were created.
+    """
+    backend = default.backend
+    source = ImageFile(name)
+    created = 0
+    for geometry_string, options in thumbnails:
+        thumbnail = backend._thumbnail_file(
+            source, geometry_string, dict(options)
+        )
+        if default.kvstore.get(thumbnail):
+            continue
+        backend.get_thumbnail(
+            name, geometry_string, synchronous=True, **options
+        )
+        if default.kvstore.get(thumbnail):
+            created += 1
+    if created:
+        Post.objects.filter(image=name).update(version=F('version') + 1)
+        changes.touch()
+    return created
+
+
+def schedule(name):
+    """Queue generation of every post thumbnail of an image.
+
+    The key only merges pending tasks, once done the image can be queued
+    again.
+    """
+    generate_all.enqueue(name, key=f'thumbnails:{name}')
+
+
+@tasks.task(keep_key=False)
+def generate_all(name):
+    """Create every post thumbnail of an image and refresh its cards."""
+    generate(name, post_thumbnails())
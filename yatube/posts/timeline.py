@@ -0,0 +1,138 @@
+"""Materialized follow timelines (fan-out on write).
+
+Every new post is copied into the ``TimelineEntry`` rows of the author's
+followers, so the follow feed is read from one indexed table. Posts of
+authors with more than ``TIMELINE_FANOUT_LIMIT`` followers are not fanned
+out and are merged into the feed at read time instead. When such an
+author drops back to the limit, their posts are copied to the timelines
+of all followers. Timelines are updated by background tasks after the
+write.
+"""
+from django.conf import settings
+from django.db.models import F
+
+from core import tasks
+from . import counters
+from .models import Follow, Post, TimelineEntry
+from .paginator import Merge
+
+
+def is_enabled():
+    return getattr(settings, 'TIMELINE_ENABLED', False)
+
+
+def is_popular(author_id):
+    return (counters.author_followers_count(author_id)
+            > settings.TIMELINE_FANOUT_LIMIT)
+
+
+def stopped_being_popular(author_id):
+    """Whether the author has just lost the follower over the limit."""
+    return (counters.author_followers_count(author_id)
+            == settings.TIMELINE_FANOUT_LIMIT)
+
+
+def popular_authors(user):
+    """Ids of popular authors the user follows, merged at read time."""
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+        ).values_list('author_id', flat=True)
+    )
+
+
+def fan_out(post):
+    if is_popular(post.author_id):
+        return
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in Follow.objects.filter(author_id=post.author_id)
+         .values_list('user_id', flat=True)),
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_id):
+    if is_popular(author_id):
+        return
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in Post.objects.filter(author_id=author_id)
+         .values_list('id', 'pub_date')),
+        ignore_conflicts=True
+    )
+
+
+def trim(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+@tasks.task
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        fan_out(post)
+
+
+@tasks.task
+def follow_changed(user_id, author_id):
+    """Backfill or trim the timeline to match the follow as it is now."""
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        backfill(user_id, author_id)
+    else:
+        trim(user_id, author_id)
+
+
+@tasks.task
+def backfill_followers(author_id):
+    """Copy posts of an author who is not popular to follower timelines."""
+    if is_popular(author_id):
+        return
+    posts = list(
+        Post.objects.filter(author_id=author_id).values_list('id', 'pub_date')
+    )
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for user_id in Follow.objects.filter(author_id=author_id)
+         .values_list('user_id', flat=True)
+         for post_id, pub_date in posts),
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def rebuild(user):
+    TimelineEntry.objects.filter(user=user).delete()
+    for author_id in Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True):
+        backfill(user.pk, author_id)
+
+
+def follow_posts(user):
+    """Posts for the follow feed of ``user``.
+
+    Posts are annotated with ``feed_date`` and ``feed_id`` to paginate on.
+    Timeline posts take these from the timeline row, so they are a range
+    read of the user's timeline index. Each popular author adds a range
+    of the author's posts index, merged into the pages in Python.
+    """
+    if not is_enabled():
+        return Post.objects.filter(author__following__user=user).annotate(
+            feed_date=F('pub_date'), feed_id=F('id')
+        )
+    posts = Post.objects.filter(timeline_entries__user=user).annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_id=F('timeline_entries__post_id')
+    )
+    popular = popular_authors(user)
+    if not popular:
+        return posts
+    return Merge(
+        posts.exclude(author_id__in=popular),
+        *(Post.objects.filter(author_id=author_id).annotate(
+            feed_date=F('pub_date'), feed_id=F('id')
+        ) for author_id in popular)
+    )
@@ -0,0 +1,80 @@
+"""Normalization of uploaded post images.
+
+Uploads are checked against a pixel budget before anything is decoded,
+downscaled to ``POST_IMAGE_MAX_DIMENSION``, re-encoded without metadata
+and named after the hash of their content, so identical uploads share
+one file on disk.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+UPLOAD_TO = 'posts/'
+KEPT_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif'}
+
+
+def content_hash(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()[:32]
+
+
+def output_format(image):
+    if image.format in KEPT_FORMATS:
+        return image.format
+    if image.mode in ('RGBA', 'LA', 'P'):
+        return 'PNG'
+    return 'JPEG'
+
+
+def encode(image, image_format):
+    max_dimension = settings.POST_IMAGE_MAX_DIMENSION
+    icc_profile = image.info.get('icc_profile')
+    if image_format == 'JPEG':
+        image.draft('RGB', (max_dimension, max_dimension))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    options = {'optimize': True}
+    if image_format == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options.update(quality=settings.POST_IMAGE_QUALITY, progressive=True)
+    if icc_profile and image_format != 'GIF':
+        options['icc_profile'] = icc_profile
+    content = BytesIO()
+    image.save(content, image_format, **options)
+    return content.getvalue()
+
+
+def normalize(upload, storage):
+    """Return stored name of a known upload or a new normalized file."""
+    digest = content_hash(upload)
+    with Image.open(upload) as image:
+        width, height = image.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                'Image is too large, upload at most %(pixels)s pixels.',
+                code='too_large',
+                params={'pixels': settings.POST_IMAGE_MAX_PIXELS},
+            )
+        image_format = output_format(image)
+        name = f'{digest}.{KEPT_FORMATS[image_format]}'
+        if storage.exists(UPLOAD_TO + name):
+            return UPLOAD_TO + name
+        if getattr(image, 'is_animated', False):
+            if max(width, height) > settings.POST_IMAGE_MAX_DIMENSION:
+                raise ValidationError(
+                    'Animated image is too large, upload at most '
+                    '%(size)spx wide and high.',
+                    code='too_large',
+                    params={'size': settings.POST_IMAGE_MAX_DIMENSION},
+                )
+            upload.seek(0)
+            return ContentFile(upload.read(), name=name)
+        return ContentFile(encode(image, image_format), name=name)
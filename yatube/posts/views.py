@@ -1,30 +1,80 @@
-from django.db.models import Prefetch
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 
+from core import loaders, tracing
+from core.decorators import cache_headers, conditional
+from core.queries import query_budget
+from core.replicas import read_from_replica
+from . import changes, counters, search, timeline
 from .forms import PostForm, CommentForm
-from .models import Comment, Group, Post, User, Follow
+from .models import Group, Post, User, Follow
+from .paginator import CursorPaginator
 
 
+def page_state(request, newest=None, version=''):
+    """Validator of a page, personal for authorized users."""
+    content, last_modified = changes.state(newest)
+    return f'{request.user.pk}:{version}:{content}', last_modified
+
+
+def index_state(request):
+    return page_state(request, changes.latest(Post.objects))
+
+
+@query_budget(7)
+@read_from_replica
+@cache_headers(settings.PAGE_MAX_AGE)
+@conditional(index_state)
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    paginator = Paginator(post_list, settings.PAGINATOR_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(Post.objects.all(), settings.PAGINATOR_AMOUNT)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    loaders.expect(page_obj, 'author', 'group')
     context = {'title': 'Last updates in Yatube',
                'page_obj': page_obj,
                }
     return render(request, 'posts/index.html', context)
 
 
-def group_posts(request, slug):
+@query_budget(6)
+@cache_headers(settings.PAGE_MAX_AGE)
+@conditional(index_state)
+def post_search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = CursorPaginator(
+        search.search_posts(query),
+        settings.PAGINATOR_AMOUNT,
+        ordering=('search_rank', 'id')
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    loaders.expect(page_obj, 'author', 'group')
+    context = {
+        'title': 'Search',
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def group_state(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts_in_group = group.posts.select_related('author')
-    paginator = Paginator(posts_in_group, settings.PAGINATOR_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    return page_state(request, changes.latest(group.posts))
+
+
+@query_budget(7)
+@read_from_replica
+@cache_headers(settings.PAGE_MAX_AGE)
+@conditional(group_state)
+def group_posts(request, slug):
+    group = loaders.add(get_object_or_404(Group, slug=slug))
+    paginator = CursorPaginator(
+        group.posts.all(),
+        settings.PAGINATOR_AMOUNT,
+        count=group.posts_count
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    loaders.expect(page_obj, 'author')
     context = {
         'title': group.title,
         'group': group,
@@ -33,12 +83,24 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
-def profile(request, username):
+def profile_state(request, username):
     author = get_object_or_404(User, username=username)
-    user_posts = author.posts.select_related('group')
-    paginator = Paginator(user_posts, settings.PAGINATOR_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    return page_state(request, changes.latest(author.posts))
+
+
+@query_budget(10)
+@read_from_replica
+@cache_headers(settings.PAGE_MAX_AGE)
+@conditional(profile_state)
+def profile(request, username):
+    author = loaders.add(get_object_or_404(User, username=username))
+    paginator = CursorPaginator(
+        author.posts.all(),
+        settings.PAGINATOR_AMOUNT,
+        count=counters.author_posts_count(author)
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    loaders.expect(page_obj, 'group')
     following = (request.user.is_authenticated
                  and author.following.filter(user=request.user).exists())
     context = {
@@ -50,22 +112,67 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def comments_paginator(post):
+    return CursorPaginator(
+        post.comments.all(),
+        settings.COMMENTS_PAGINATOR_AMOUNT,
+        ordering=('created', 'id'),
+        count=post.comments_count
+    )
+
+
+def comments_page(request, post):
+    with tracing.span('comments', attributes={'post.id': post.pk}):
+        comments = comments_paginator(post).get_page(
+            request.GET.get('cursor')
+        )
+    loaders.expect(comments, 'author')
+    return comments
+
+
+def post_state(request, post_id):
+    post = get_object_or_404(
+        Post.objects.values('version', 'pub_date'), pk=post_id
+    )
+    return page_state(request, post['pub_date'], post['version'])
+
+
+@query_budget(7)
+@read_from_replica
+@cache_headers(settings.PAGE_MAX_AGE)
+@conditional(post_state)
 def post_detail(request, post_id):
     post = get_object_or_404(
-        Post.objects.select_related('author', 'group')
-        .prefetch_related(Prefetch(
-            'comments',
-            queryset=Comment.objects.select_related('author'))),
+        Post.objects.select_related('author', 'group'),
         pk=post_id
     )
+    # Comments by the author or the reader reuse their instances.
+    post.author = loaders.add(post.author)
+    comments = comments_page(request, post)
     form = CommentForm()
     context = {
         'post': post,
         'form': form,
+        'comments': comments,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(7)
+@read_from_replica
+@cache_headers(settings.PAGE_MAX_AGE)
+@conditional(post_state)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    comments = comments_page(request, post)
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+@query_budget(10)
 @login_required
 def post_create(request):
     form = PostForm(
@@ -84,6 +191,7 @@ def post_create(request):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(9)
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post.objects.select_related('author'), pk=post_id)
@@ -105,6 +213,7 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(10)
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -114,15 +223,34 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        url = reverse('posts:post_detail', kwargs={'post_id': post_id})
+        cursor = comments_paginator(post).cursor_ending_with(comment)
+        if cursor:
+            url = f'{url}?cursor={cursor}'
+        return redirect(f'{url}#comment-{comment.pk}')
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def follow_state(request):
+    return page_state(
+        request,
+        changes.latest(timeline.follow_posts(request.user), 'feed_date')
+    )
+
+
+@query_budget(9)
 @login_required
+@read_from_replica
+@cache_headers(settings.PAGE_MAX_AGE)
+@conditional(follow_state)
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, settings.PAGINATOR_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(
+        timeline.follow_posts(request.user),
+        settings.PAGINATOR_AMOUNT,
+        ordering=('-feed_date', '-feed_id')
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    loaders.expect(page_obj, 'author', 'group')
     context = {
         'title': 'Posts by authors you follow',
         'page_obj': page_obj,
@@ -130,6 +258,7 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(12)
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -139,6 +268,7 @@ def profile_follow(request, username):
     return redirect('posts:profile', username=author.username)
 
 
+@query_budget(10)
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
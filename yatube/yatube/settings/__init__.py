@@ -0,0 +1,15 @@
+"""Settings profile is chosen with YATUBE_ENV: "dev" (default) or "prod"."""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILE = os.getenv('YATUBE_ENV', 'dev')
+
+if PROFILE == 'dev':
+    from .dev import *  # noqa: F401,F403
+elif PROFILE == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f'YATUBE_ENV must be "dev" or "prod", not "{PROFILE}"'
+    )
@@ -0,0 +1,307 @@
+"""
+Django settings for yatube project shared by every profile.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'b*favy306phw!36%wx8u$_i#+vqv#uuoj^kfvfej(b154pw8iw'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+    'www.loverazz.pythonanywhere.com',
+    'loverazz.pythonanywhere.com'
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.tracing.TracingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.loaders.LoaderMiddleware',
+    'core.replicas.PinPrimaryMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.ProfilingMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+# PRAGMA statements run on every new SQLite connection (see core.signals).
+SQLITE_PRAGMAS = {}
+
+# Read-only feed views query one of DATABASE_REPLICAS, users who wrote
+# something stay on the primary for REPLICA_PIN_SECONDS (core.replicas).
+# YATUBE_REPLICA_DB adds a local SQLite file as a replica.
+DATABASE_ROUTERS = ['core.replicas.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 10
+if os.getenv('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('YATUBE_REPLICA_DB'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+
+# Query budgets of core.queries.QueryBudgetMiddleware, enabled in dev.
+# Views declare their own budget with core.queries.query_budget.
+QUERY_BUDGET = None
+QUERY_REPEAT_LIMIT = 3
+QUERY_BUDGET_ACTION = 'log'
+
+# Every response carries the request ID from TRACING_REQUEST_ID_HEADER or
+# a new one. YATUBE_TRACING_FILE turns on tracing (core.tracing), spans are
+# appended to the file as OTLP/JSON lines.
+TRACING_REQUEST_ID_HEADER = 'X-Request-ID'
+TRACING_FILE = os.getenv('YATUBE_TRACING_FILE')
+TRACING_SAMPLE_RATE = float(os.getenv('YATUBE_TRACING_SAMPLE_RATE', 1))
+TRACING_SERVICE_NAME = 'yatube'
+
+# Sampled profiling of views (core.profiling), off while the rate is 0.
+# PROFILING_OUTPUT is None, 'pstats' or 'collapsed'. Aggregate samples
+# with `python manage.py profile_report`.
+PROFILING_SAMPLE_RATE = float(os.getenv('YATUBE_PROFILING_SAMPLE_RATE', 0))
+PROFILING_VIEWS = ('posts.views',)
+PROFILING_DIR = os.getenv(
+    'YATUBE_PROFILING_DIR', os.path.join(BASE_DIR, 'profiles')
+)
+PROFILING_OUTPUT = os.getenv('YATUBE_PROFILING_OUTPUT')
+PROFILING_INTERVAL = 0.005
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+PAGINATOR_AMOUNT = 10
+COMMENTS_PAGINATOR_AMOUNT = 20
+
+# Seconds shared caches may keep pages of anonymous users. Pages of
+# authorized users are private and revalidated with their ETag.
+PAGE_MAX_AGE = 60
+ABOUT_PAGE_MAX_AGE = 60 * 60 * 24
+
+# Follow feed is read from precomputed per-user timelines. Posts of authors
+# with more followers than the limit are merged into the feed at read time.
+TIMELINE_ENABLED = True
+TIMELINE_FANOUT_LIMIT = 1000
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATIC_MAX_AGE = 60
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:main_page'
+# LOGOUT_REDIRECT_URL = 'posts:index'
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Media files are served by core.media. MEDIA_OFFLOAD hands the transfer
+# to the front server: "x-accel-redirect" for nginx with an internal
+# location at MEDIA_OFFLOAD_PREFIX, or "x-sendfile". Thumbnails never
+# change under their names, so they are cached as immutable.
+MEDIA_OFFLOAD = os.getenv('YATUBE_MEDIA_OFFLOAD')
+MEDIA_OFFLOAD_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60
+MEDIA_IMMUTABLE_PREFIXES = ('cache/',)
+
+# Cache backend is chosen with YATUBE_CACHE, the default is "locmem" here
+# and "sqlite" in the prod profile: "locmem" keeps a cache per process,
+# "sqlite" and "file" share one cache between all processes on the host,
+# "memcached" uses the servers listed in YATUBE_CACHE_LOCATION.
+# Bump YATUBE_CACHE_VERSION to invalidate everything on deploy.
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    },
+}
+
+
+def cache_settings(default_backend):
+    """CACHES of the YATUBE_CACHE backend, ``default_backend`` if unset.
+
+    {% cache %} fragments use their own alias of the same cache, so that
+    core.metrics counts their hits and misses apart. Every backend is
+    wrapped to count lookups.
+    """
+    default = {
+        **CACHE_BACKENDS[os.getenv('YATUBE_CACHE', default_backend)],
+        'KEY_PREFIX': os.getenv('YATUBE_CACHE_PREFIX', 'yatube'),
+        'VERSION': int(os.getenv('YATUBE_CACHE_VERSION', 1)),
+    }
+    if os.getenv('YATUBE_CACHE_LOCATION'):
+        default['LOCATION'] = os.getenv('YATUBE_CACHE_LOCATION')
+    return {
+        alias: {
+            **default,
+            'BACKEND': 'core.metrics.InstrumentedCache',
+            'CACHE_BACKEND': default['BACKEND'],
+            'ALIAS': alias,
+        }
+        for alias in ('default', 'template_fragments')
+    }
+
+
+CACHES = cache_settings('locmem')
+
+# Metrics (core.metrics) are served at /metrics/ to METRICS_ALLOWED_IPS.
+# With YATUBE_METRICS_DIR every worker process writes its values there and
+# the endpoint sums them, clear the directory when the service starts.
+METRICS_DIR = os.getenv('YATUBE_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = os.getenv(
+    'YATUBE_METRICS_ALLOWED_IPS', '127.0.0.1,::1'
+).split(',')
+
+# Uploaded post images above the pixel budget are rejected before decoding,
+# the rest are downscaled, stripped of metadata and stored under a hash.
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_DIMENSION = 2560
+POST_IMAGE_QUALITY = 85
+
+# Post thumbnails are generated by a background task per image, requests
+# show the original image until the thumbnails are ready.
+THUMBNAIL_BACKEND = 'posts.thumbnails.AsyncThumbnailBackend'
+
+# Side effects of writes, like timelines and thumbnails of uploads, are
+# queued as background tasks for the run_tasks worker, which runs them on
+# a pool of threads and retries failures with exponential backoff. Times
+# are in seconds. Eager tasks run inline where they are queued, without a
+# worker.
+TASKS_EAGER = False
+TASKS_WORKERS = int(os.getenv('YATUBE_TASKS_WORKERS', 4))
+TASKS_POLL_INTERVAL = 1
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_RETRY_MAX_DELAY = 60 * 60
+TASKS_LEASE = 60 * 10
+TASKS_KEEP_DONE = 60 * 60 * 24 * 7
@@ -0,0 +1,18 @@
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+
+MIDDLEWARE = MIDDLEWARE + [
+    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.queries.QueryBudgetMiddleware',
+]
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+# Tasks run inline, no worker is needed for development.
+TASKS_EAGER = True
@@ -0,0 +1,40 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, TEMPLATES, cache_settings
+
+DEBUG = False
+
+SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+
+if os.getenv('YATUBE_ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.getenv('YATUBE_ALLOWED_HOSTS').split(',')
+
+# Templates are compiled once per process.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = 60
+
+# Workers share one cache, so invalidating a card reaches all of them.
+CACHES = cache_settings('sqlite')
+
+# WAL lets readers work alongside the writer, NORMAL sync is safe with WAL.
+# cache_size is in KiB when negative, mmap_size in bytes, timeout in ms.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+# collectstatic hashes and precompresses files and the WSGI application
+# serves them itself (see core.staticfiles).
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
@@ -17,13 +17,18 @@ from django.contrib import admin
 from django.urls import include, path
 
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core import media
+from core.views import cache_status, metrics_exposition
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('api/v1/', include('api.urls', namespace='api')),
+    path('health/cache/', cache_status, name='cache_status'),
+    path('metrics/', metrics_exposition, name='metrics'),
     path('', include('about.urls', namespace='about'))
 ]
 
@@ -31,9 +36,13 @@ handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+        media.serve,
+        name='media'
+    )]
+
 if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
     import debug_toolbar
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
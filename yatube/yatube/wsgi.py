@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if not settings.DEBUG:
+    from core.staticfiles import StaticFilesApplication
+
+    application = StaticFilesApplication(
+        application,
+        settings.STATIC_ROOT,
+        settings.STATIC_URL,
+        settings.STATIC_MAX_AGE
+    )